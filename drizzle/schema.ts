@@ -4192,6 +4192,9 @@ export const employeeHierarchy = mysqlTable("employeeHierarchy", {
   presidentEmail: varchar("presidentEmail", { length: 320 }),
   presidentId: int("presidentId"), // ID do presidente na tabela employees (se existir)
   
+  // Hash SHA-256 do conteúdo da linha (usado pela importação incremental do import-hierarchy.py)
+  rowHash: varchar("rowHash", { length: 64 }),
+  
   // Metadados
   importedAt: timestamp("importedAt").defaultNow().notNull(), // Data da importação
   updatedAt: timestamp("updatedAt").defaultNow().onUpdateNow().notNull(),
@@ -4203,6 +4206,26 @@ export const employeeHierarchy = mysqlTable("employeeHierarchy", {
 export type EmployeeHierarchy = typeof employeeHierarchy.$inferSelect;
 export type InsertEmployeeHierarchy = typeof employeeHierarchy.$inferInsert;
 
+/**
+ * Employee Closure - Fechamento da hierarquia (employees.managerId)
+ * Um registro por par ancestral/descendente, em qualquer profundidade,
+ * incluindo o próprio funcionário com depth = 0.
+ * Recalculada por scripts/org_closure.py
+ */
+export const employeeClosure = mysqlTable("employeeClosure", {
+  id: int("id").autoincrement().primaryKey(),
+  ancestorId: int("ancestorId").notNull(), // ID do líder (employees.id)
+  descendantId: int("descendantId").notNull(), // ID do subordinado (employees.id)
+  depth: int("depth").notNull(), // Distância na hierarquia (1 = subordinado direto)
+  createdAt: timestamp("createdAt").defaultNow().notNull(),
+
+  // Índices (criados por scripts/org_closure.py)
+  // UNIQUE (ancestorId, descendantId), (ancestorId, depth), (descendantId, depth)
+});
+
+export type EmployeeClosure = typeof employeeClosure.$inferSelect;
+export type InsertEmployeeClosure = typeof employeeClosure.$inferInsert;
+
 // ============================================================================
 // TABELAS DE PIR COM VÍDEO E DETECÇÃO DE FRAUDES
 // ============================================================================
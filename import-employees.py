@@ -5,10 +5,25 @@ Processa planilha Excel e prepara dados para importação no sistema AVD UISA
 """
 
 import pandas as pd
+import argparse
+import gzip
 import json
+import os
+import shutil
 import sys
+import tempfile
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from excel_cache import read_excel_cached
+from role_classifier import title_in, title_matcher
+from usernames import UsernameAllocator, base_username, generate_usernames
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Cargos que devem ser cadastrados como usuários do sistema
 LEADERSHIP_ROLES = [
     'Lider',
@@ -23,6 +38,9 @@ LEADERSHIP_ROLES = [
     'Especialista'
 ]
 
+# Comparação sem diferenciar acentos e maiúsculas ("Líder" == "Lider")
+LEADERSHIP_TITLES = title_matcher(LEADERSHIP_ROLES)
+
 def normalize_phone(phone):
     """Normaliza número de telefone"""
     if pd.isna(phone):
@@ -49,118 +67,136 @@ def normalize_email(email):
     return email_str
 
 def is_leadership_role(cargo):
-    """Verifica se o cargo é de liderança"""
-    if pd.isna(cargo):
-        return False
-    cargo_str = str(cargo).strip()
-    return cargo_str in LEADERSHIP_ROLES
+    """Verifica se o cargo (valor único ou Series) é de liderança"""
+    return title_in(cargo, LEADERSHIP_TITLES)
 
 def generate_username(name, chapa):
-    """Gera username baseado no nome e chapa"""
-    if pd.isna(name):
-        return f"user_{chapa}"
+    """Gera username baseado no nome e chapa (sem resolver colisões)"""
+    return base_username(name, chapa)
+
+def normalize_employee_row(row, line_number):
+    """
+    Converte uma linha da planilha (Series do pandas ou dict) no registro do funcionário.
+    
+    Retorna None para linhas sem chapa ou nome.
+    """
+    chapa = str(row['CHAPA']).replace('.0', '') if not pd.isna(row['CHAPA']) else None
+    nome = str(row['NOME']).strip() if not pd.isna(row['NOME']) else None
+    
+    if not chapa or not nome:
+        print(f"Linha {line_number}: Ignorando registro sem chapa ou nome")
+        return None
+    
+    # Normalizar emails
+    email_pessoal = normalize_email(row.get('EMAILPESSOAL'))
+    email_corporativo = normalize_email(row.get('EMAILCORPORATIVO'))
+    
+    # Usar email corporativo como principal, se disponível
+    email_principal = email_corporativo or email_pessoal
+    
+    # Normalizar telefone
+    telefone = normalize_phone(row.get('TELEFONE'))
     
-    # Pega primeiro nome e primeiro sobrenome
-    parts = str(name).strip().split()
-    if len(parts) >= 2:
-        username = f"{parts[0].lower()}.{parts[1].lower()}"
-    else:
-        username = parts[0].lower()
+    # Cargo
+    cargo = str(row['CARGO']).strip() if not pd.isna(row['CARGO']) else None
     
-    # Remove acentos e caracteres especiais
-    username = username.replace('á', 'a').replace('é', 'e').replace('í', 'i')
-    username = username.replace('ó', 'o').replace('ú', 'u').replace('ã', 'a')
-    username = username.replace('õ', 'o').replace('ç', 'c').replace('ê', 'e')
-    username = username.replace('â', 'a').replace('ô', 'o').replace('à', 'a')
+    return {
+        'chapa': chapa,
+        'name': nome,
+        'email': email_principal,
+        'personalEmail': email_pessoal,
+        'corporateEmail': email_corporativo,
+        'employeeCode': chapa,  # Usar chapa como código
+        'codSecao': str(row['CODSEÇÃO']) if not pd.isna(row['CODSEÇÃO']) else None,
+        'secao': str(row['SEÇÃO']).strip() if not pd.isna(row['SEÇÃO']) else None,
+        'codFuncao': str(row['CODFUNÇÃO']).replace('.0', '') if not pd.isna(row['CODFUNÇÃO']) else None,
+        'funcao': str(row['FUNÇÃO']).strip() if not pd.isna(row['FUNÇÃO']) else None,
+        'situacao': str(row['SITUAÇÃO']).strip() if not pd.isna(row['SITUAÇÃO']) else None,
+        'gerencia': str(row['GERENCIA']).strip() if not pd.isna(row['GERENCIA']) else None,
+        'diretoria': str(row['DIRETORIA']).strip() if not pd.isna(row['DIRETORIA']) else None,
+        'cargo': cargo,
+        'telefone': telefone,
+        'active': True,
+        'status': 'ativo'
+    }
+
+def build_leader_user(employee, is_leader=None, username=None):
+    """
+    Retorna o usuário a criar para o funcionário, ou None se o cargo não for de liderança.
     
-    # Remove caracteres não alfanuméricos
-    username = ''.join(c for c in username if c.isalnum() or c == '.')
+    `is_leader` e `username` permitem informar valores já calculados para a planilha inteira.
+    """
+    if is_leader is None:
+        is_leader = is_leadership_role(employee['cargo'])
+    if not is_leader:
+        return None
     
-    return username
+    return {
+        'employeeCode': employee['chapa'],
+        'username': username or generate_username(employee['name'], employee['chapa']),
+        'name': employee['name'],
+        'email': employee['email'],
+        'cargo': employee['cargo'],
+        'needsUserAccount': True
+    }
 
-def process_excel(file_path):
-    """Processa planilha Excel e retorna dados estruturados"""
+def print_summary(total_employees, total_users, cargo_counts):
+    """Imprime o resumo da importação"""
+    print(f"\nResumo:")
+    print(f"- Funcionários a importar: {total_employees}")
+    print(f"- Usuários de liderança a criar: {total_users}")
     
+    print(f"\nCargos de liderança encontrados:")
+    for cargo, count in sorted(cargo_counts.items()):
+        print(f"  - {cargo}: {count}")
+
+def iter_dataframe_records(file_path, taken_usernames=()):
+    """
+    Gera (employee, user) a partir da planilha carregada com pandas.
+    
+    Os usernames dos líderes são gerados em lote, únicos entre si e em relação
+    a `taken_usernames`.
+    """
     print(f"Lendo planilha: {file_path}")
-    df = pd.read_excel(file_path)
+    df = read_excel_cached(file_path)
     
     print(f"Total de registros: {len(df)}")
     
+    # Classificar os cargos de liderança da planilha inteira de uma vez
+    leaders = is_leadership_role(df['CARGO'])
+    
+    # Mesmo critério de normalize_employee_row para linhas válidas
+    valid = df['CHAPA'].notna() & df['NOME'].notna() & (df['NOME'].astype(str).str.strip() != '')
+    leader_rows = df.loc[leaders & valid]
+    usernames = generate_usernames(
+        leader_rows['NOME'].astype(str).str.strip(),
+        leader_rows['CHAPA'].astype(str).str.replace('.0', '', regex=False),
+        taken=taken_usernames
+    )
+    
+    for idx, row in df.iterrows():
+        employee = normalize_employee_row(row, idx + 2)
+        if employee is not None:
+            yield employee, build_leader_user(employee, leaders.at[idx], usernames.get(idx))
+
+def process_excel(file_path, taken_usernames=()):
+    """Processa planilha Excel e retorna dados estruturados"""
     employees = []
     users_to_create = []
     
-    for idx, row in df.iterrows():
-        # Dados do funcionário
-        chapa = str(row['CHAPA']).replace('.0', '') if not pd.isna(row['CHAPA']) else None
-        nome = str(row['NOME']).strip() if not pd.isna(row['NOME']) else None
-        
-        if not chapa or not nome:
-            print(f"Linha {idx + 2}: Ignorando registro sem chapa ou nome")
-            continue
-        
-        # Normalizar emails
-        email_pessoal = normalize_email(row.get('EMAILPESSOAL'))
-        email_corporativo = normalize_email(row.get('EMAILCORPORATIVO'))
-        
-        # Usar email corporativo como principal, se disponível
-        email_principal = email_corporativo or email_pessoal
-        
-        # Normalizar telefone
-        telefone = normalize_phone(row.get('TELEFONE'))
-        
-        # Cargo
-        cargo = str(row['CARGO']).strip() if not pd.isna(row['CARGO']) else None
-        
-        # Dados do funcionário
-        employee = {
-            'chapa': chapa,
-            'name': nome,
-            'email': email_principal,
-            'personalEmail': email_pessoal,
-            'corporateEmail': email_corporativo,
-            'employeeCode': chapa,  # Usar chapa como código
-            'codSecao': str(row['CODSEÇÃO']) if not pd.isna(row['CODSEÇÃO']) else None,
-            'secao': str(row['SEÇÃO']).strip() if not pd.isna(row['SEÇÃO']) else None,
-            'codFuncao': str(row['CODFUNÇÃO']).replace('.0', '') if not pd.isna(row['CODFUNÇÃO']) else None,
-            'funcao': str(row['FUNÇÃO']).strip() if not pd.isna(row['FUNÇÃO']) else None,
-            'situacao': str(row['SITUAÇÃO']).strip() if not pd.isna(row['SITUAÇÃO']) else None,
-            'gerencia': str(row['GERENCIA']).strip() if not pd.isna(row['GERENCIA']) else None,
-            'diretoria': str(row['DIRETORIA']).strip() if not pd.isna(row['DIRETORIA']) else None,
-            'cargo': cargo,
-            'telefone': telefone,
-            'active': True,
-            'status': 'ativo'
-        }
-        
+    for employee, user in iter_dataframe_records(file_path, taken_usernames):
         employees.append(employee)
         
         # Verificar se é cargo de liderança
-        if is_leadership_role(cargo):
-            username = generate_username(nome, chapa)
-            
-            user = {
-                'employeeCode': chapa,
-                'username': username,
-                'name': nome,
-                'email': email_principal,
-                'cargo': cargo,
-                'needsUserAccount': True
-            }
-            
+        if user:
             users_to_create.append(user)
     
-    print(f"\nResumo:")
-    print(f"- Funcionários a importar: {len(employees)}")
-    print(f"- Usuários de liderança a criar: {len(users_to_create)}")
-    
-    print(f"\nCargos de liderança encontrados:")
     cargo_counts = {}
     for user in users_to_create:
         cargo = user['cargo']
         cargo_counts[cargo] = cargo_counts.get(cargo, 0) + 1
     
-    for cargo, count in sorted(cargo_counts.items()):
-        print(f"  - {cargo}: {count}")
+    print_summary(len(employees), len(users_to_create), cargo_counts)
     
     return {
         'employees': employees,
@@ -172,22 +208,189 @@ def process_excel(file_path):
         }
     }
 
+def iter_excel_rows(file_path):
+    """
+    Lê a primeira aba da planilha linha a linha (openpyxl em modo read_only),
+    gerando (número da linha, dict coluna -> valor) sem carregar a planilha inteira.
+    """
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(column).strip() if column is not None else '' for column in next(rows, ())]
+        
+        for line_number, values in enumerate(rows, 2):
+            if all(value is None for value in values):
+                continue
+            yield line_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+def iter_employee_records(file_path, taken_usernames=()):
+    """
+    Modo streaming de process_excel: gera (employee, user) para cada linha válida,
+    onde user é None quando o cargo não é de liderança.
+    """
+    print(f"Lendo planilha (streaming): {file_path}")
+    
+    allocator = UsernameAllocator(taken_usernames)
+    
+    for line_number, row in iter_excel_rows(file_path):
+        employee = normalize_employee_row(row, line_number)
+        if employee is not None:
+            user = build_leader_user(employee)
+            if user:
+                user['username'] = allocator.allocate(user['username'])
+            yield employee, user
+
+def write_import_json_streaming(records, output_file):
+    """
+    Grava o mesmo documento de process_excel a partir do gerador de registros,
+    sem manter a lista de funcionários em memória.
+    
+    Os usuários são acumulados em um arquivo temporário e anexados ao final.
+    Retorna o bloco de resumo.
+    """
+    total_employees = 0
+    total_users = 0
+    cargo_counts = {}
+    
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as users_spool, \
+            open(output_file, 'w', encoding='utf-8') as f:
+        f.write('{\n  "employees": [')
+        
+        for employee, user in records:
+            f.write(',\n    ' if total_employees else '\n    ')
+            json.dump(employee, f, ensure_ascii=False)
+            total_employees += 1
+            
+            if user:
+                users_spool.write(',\n    ' if total_users else '\n    ')
+                json.dump(user, users_spool, ensure_ascii=False)
+                total_users += 1
+                cargo_counts[user['cargo']] = cargo_counts.get(user['cargo'], 0) + 1
+        
+        f.write('\n  ],\n  "users": [')
+        users_spool.seek(0)
+        shutil.copyfileobj(users_spool, f)
+        f.write('\n  ],\n  "summary": ')
+        
+        summary = {
+            'total_employees': total_employees,
+            'total_users': total_users,
+            'leadership_roles': cargo_counts
+        }
+        json.dump(summary, f, ensure_ascii=False)
+        f.write('\n}\n')
+    
+    print_summary(total_employees, total_users, cargo_counts)
+    return summary
+
+def serialize_ndjson_line(obj):
+    """Serializa um objeto como uma linha NDJSON (bytes), com orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def summary_sidecar_path(output_file):
+    """import-data.ndjson(.gz) -> import-data.summary.json"""
+    base = output_file
+    for suffix in ('.gz', '.ndjson', '.jsonl', '.json'):
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+    return f"{base}.summary.json"
+
+def write_import_ndjson(records, output_file, compress=False):
+    """
+    Grava um registro por linha: {"type": "employee"|"user", "data": {...}}.
+    
+    O usuário de liderança vem logo após o funcionário correspondente, para que
+    consumidores processem o arquivo de forma incremental. O resumo vai para um
+    arquivo separado (<saida>.summary.json). Retorna o resumo.
+    """
+    total_employees = 0
+    total_users = 0
+    cargo_counts = {}
+    
+    opener = gzip.open if compress else open
+    with opener(output_file, 'wb') as f:
+        for employee, user in records:
+            f.write(serialize_ndjson_line({'type': 'employee', 'data': employee}))
+            total_employees += 1
+            
+            if user:
+                f.write(serialize_ndjson_line({'type': 'user', 'data': user}))
+                total_users += 1
+                cargo_counts[user['cargo']] = cargo_counts.get(user['cargo'], 0) + 1
+    
+    summary = {
+        'total_employees': total_employees,
+        'total_users': total_users,
+        'leadership_roles': cargo_counts
+    }
+    
+    summary_file = summary_sidecar_path(output_file)
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    
+    print_summary(total_employees, total_users, cargo_counts)
+    print(f"\nResumo salvo em: {summary_file}")
+    return summary
+
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Uso: python import-employees.py <caminho_planilha>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Processa a planilha de funcionários para importação")
+    parser.add_argument('file_path', help="Caminho da planilha")
+    parser.add_argument('--output', default=None,
+                        help="Arquivo de saída (padrão: import-data.json ou import-data.ndjson[.gz])")
+    parser.add_argument('--stream', action='store_true',
+                        help="Lê a planilha linha a linha e grava a saída incrementalmente (memória constante)")
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help="json: documento único; ndjson: um funcionário/usuário por linha + resumo à parte")
+    parser.add_argument('--gzip', action='store_true', help="Comprime a saída NDJSON com gzip")
+    parser.add_argument('--check-existing-users', action='store_true',
+                        help="Evita usernames já em uso na tabela users (requer DATABASE_URL)")
+    args = parser.parse_args()
+    
+    if args.gzip and args.format != 'ndjson':
+        parser.error("--gzip só é suportado com --format ndjson")
     
-    file_path = sys.argv[1]
+    if args.output is None:
+        output_dir = '/home/ubuntu/avd-uisa-sistema-completo'
+        if args.format == 'ndjson':
+            args.output = f"{output_dir}/import-data.ndjson{'.gz' if args.gzip else ''}"
+        else:
+            args.output = f"{output_dir}/import-data.json"
     
     try:
-        result = process_excel(file_path)
+        taken_usernames = set()
+        if args.check_existing_users:
+            from avd_db import get_connection
+            from usernames import load_existing_usernames
+            
+            conn = get_connection()
+            try:
+                taken_usernames = load_existing_usernames(conn)
+            finally:
+                conn.close()
+            print(f"Usernames já em uso: {len(taken_usernames)}")
         
-        # Salvar resultado em JSON
-        output_file = '/home/ubuntu/avd-uisa-sistema-completo/import-data.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        if args.format == 'ndjson':
+            if args.stream:
+                records = iter_employee_records(args.file_path, taken_usernames)
+            else:
+                records = iter_dataframe_records(args.file_path, taken_usernames)
+            write_import_ndjson(records, args.output, compress=args.gzip)
+        elif args.stream:
+            write_import_json_streaming(iter_employee_records(args.file_path, taken_usernames), args.output)
+        else:
+            result = process_excel(args.file_path, taken_usernames)
+            
+            # Salvar resultado em JSON
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
         
-        print(f"\nDados processados salvos em: {output_file}")
+        print(f"\nDados processados salvos em: {args.output}")
         print("Pronto para importação!")
         
     except Exception as e:
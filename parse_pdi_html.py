@@ -1,197 +1,452 @@
 #!/usr/bin/env python3
 """
 Script para extrair dados estruturados de arquivos HTML de PDI (Plano de Desenvolvimento Individual)
+
+O HTML é lido com o parser do lxml e percorrido uma única vez: nesse passo são
+indexados o título, o cargo, os parágrafos marcadores de cada seção (foco,
+sponsor, gaps, 70-20-10 e responsabilidades), as listas, os cards de KPI e a
+tabela de remuneração. Cada campo é extraído desse índice, sem novas buscas no
+documento.
+
+As regras de correspondência são as da versão com BeautifulSoup, para que o
+JSON gerado seja o mesmo: um marcador só é reconhecido em um <p> cujo texto
+seja uma única string (sem elementos mistos, como em
+<p><strong>Diretor Sponsor:</strong> Nome</p>), e a lista de uma seção é a
+primeira <ul> depois do marcador, em ordem de documento.
+
+Uso:
+    python parse_pdi_html.py                                # PDIs de exemplo -> pdi_data.json
+    python parse_pdi_html.py pdi-imports/ --output pdis.ndjson
+    python parse_pdi_html.py 'pdi-imports/**/*.html' --workers 8 > pdis.ndjson
+
+Com diretórios ou padrões glob, os arquivos são processados em paralelo (um
+processo por núcleo, por padrão) e cada resultado é gravado como uma linha
+NDJSON assim que fica pronto. Um arquivo com erro gera a linha
+{"html_original": ..., "erro": ...} sem interromper os demais.
+
+Os resultados ficam em cache (scripts/pdi_cache.py), identificados pelo
+SHA-256 do HTML e por PARSER_VERSION: arquivos que não mudaram não são
+reprocessados. --no-cache (ou PDI_CACHE=0) desliga o cache.
 """
 
+import argparse
+import glob
 import json
+import os
 import re
-from bs4 import BeautifulSoup
+import sys
+from bisect import bisect_right
+from functools import partial
+from multiprocessing import Pool
 from pathlib import Path
 
+from lxml import etree, html
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+import pdi_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Incrementar sempre que a extração mudar: invalida os resultados em cache
+PARSER_VERSION = 1
+
+TITLE_NAME_PATTERN = re.compile(r'Plano de Performance e Desenvolvimento - (.+?) \|')
+CARGO_CLASS = 'text-md text-uisa-orange font-semibold'
+KPI_CARD_CLASS = 'kpi-card'
+KPI_LABEL_CLASS = 'text-sm'
+KPI_VALUE_CLASS_PATTERN = re.compile(r'text-lg|text-xl')
+GAP_PATTERN = re.compile(r'(.+?):\s*(.+)')
+
+# Parágrafos que abrem cada seção do PDI
+MARKER_PATTERNS = {
+    'foco': re.compile(r'Foco do Desenvolvimento:'),
+    'sponsor': re.compile(r'Diretor Sponsor:'),
+    'gaps': re.compile(r'Gaps Prioritários a Desenvolver:'),
+    '70_pratica': re.compile(r'70% - Aprendizado na Prática'),
+    '20_social': re.compile(r'20% - Aprendizado com Outros'),
+    '10_formal': re.compile(r'10% - Aprendizado Formal'),
+    'colaborador': re.compile(r'Responsabilidades de .+ \(O Protagonista\)'),
+    'lideranca': re.compile(r'Responsabilidades da Liderança'),
+    'dho': re.compile(r'Responsabilidades do DHO'),
+}
+
+# Marcadores cujo valor está no próprio parágrafo
+MARKER_VALUE_PATTERNS = {
+    'foco': re.compile(r'Foco do Desenvolvimento:\s*(.+)'),
+    'sponsor': re.compile(r'Diretor Sponsor:\s*(.+)'),
+}
+
+PLANO_ACAO_SECTIONS = ('70_pratica', '20_social', '10_formal')
+RESPONSABILIDADES_SECTIONS = ('colaborador', 'lideranca', 'dho')
 
-def parse_pdi_html(html_path):
+_PARSER = html.HTMLParser(encoding='utf-8')
+
+
+def element_text(element):
+    """Texto do elemento e de seus descendentes (equivalente a Tag.text)"""
+    return ''.join(element.itertext())
+
+
+def single_string(element):
     """
-    Extrai dados estruturados de um arquivo HTML de PDI
+    Texto do elemento quando ele contém uma única string, diretamente ou em um
+    único filho (equivalente a Tag.string); None nos demais casos
+    """
+    children = list(element)
+    if element.text:
+        return None if children else element.text
+    if len(children) != 1 or children[0].tail:
+        return None
+    child = children[0]
+    if not isinstance(child.tag, str):
+        # Comentário como único conteúdo
+        return child.text if child.tag is etree.Comment else None
+    return single_string(child)
+
+
+def class_tokens(element):
+    return element.get('class', '').split()
+
+
+def has_class(element, name):
+    """Mesmo critério de find(class_='...'): uma das classes ou o atributo inteiro"""
+    tokens = class_tokens(element)
+    return name in tokens or ' '.join(tokens) == name
+
+
+def index_document(root):
     """
-    with open(html_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-    
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Extrair informações básicas
-    title_tag = soup.find('title')
-    title = title_tag.text if title_tag else ""
-    
-    # Extrair nome do colaborador
-    nome_match = re.search(r'Plano de Performance e Desenvolvimento - (.+?) \|', title)
-    nome = nome_match.group(1).strip() if nome_match else ""
-    
-    # Extrair cargo
-    cargo_elem = soup.find('p', class_='text-md text-uisa-orange font-semibold')
-    cargo = cargo_elem.text.strip() if cargo_elem else ""
-    
-    # Extrair foco do desenvolvimento
-    foco_elem = soup.find('p', string=re.compile(r'Foco do Desenvolvimento:'))
-    foco = ""
-    if foco_elem:
-        foco_text = foco_elem.text
-        foco_match = re.search(r'Foco do Desenvolvimento:\s*(.+)', foco_text)
-        if foco_match:
-            foco = foco_match.group(1).strip()
-    
-    # Extrair diretor sponsor
-    sponsor_elem = soup.find('p', string=re.compile(r'Diretor Sponsor:'))
-    sponsor = ""
-    if sponsor_elem:
-        sponsor_text = sponsor_elem.text
-        sponsor_match = re.search(r'Diretor Sponsor:\s*(.+)', sponsor_text)
-        if sponsor_match:
-            sponsor = sponsor_match.group(1).strip()
-    
-    # Extrair KPIs
-    kpi_cards = soup.find_all('div', class_='kpi-card')
+    Percorre a árvore uma vez e devolve o índice usado na extração:
+    title, cargo, markers ({chave: (posição, <p>)}), list_positions/lists
+    (<ul> em ordem de documento), kpi_cards e table.
+    """
+    index = {
+        'title': None,
+        'cargo': None,
+        'markers': {},
+        'list_positions': [],
+        'lists': [],
+        'kpi_cards': [],
+        'table': None,
+    }
+    markers = index['markers']
+    pending = dict(MARKER_PATTERNS)
+
+    for position, element in enumerate(root.iter()):
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+
+        if tag == 'p':
+            if index['cargo'] is None and has_class(element, CARGO_CLASS):
+                index['cargo'] = element
+            if pending:
+                text = single_string(element)
+                if text is not None:
+                    for key, pattern in list(pending.items()):
+                        if pattern.search(text):
+                            markers[key] = (position, element)
+                            del pending[key]
+        elif tag == 'ul':
+            index['list_positions'].append(position)
+            index['lists'].append(element)
+        elif tag == 'div':
+            if has_class(element, KPI_CARD_CLASS):
+                index['kpi_cards'].append(element)
+        elif tag == 'title':
+            if index['title'] is None:
+                index['title'] = element
+        elif tag == 'table':
+            if index['table'] is None:
+                index['table'] = element
+
+    return index
+
+
+def list_after_marker(index, key):
+    """Primeira <ul> depois do marcador, ou None"""
+    marker = index['markers'].get(key)
+    if marker is None:
+        return None
+    position = bisect_right(index['list_positions'], marker[0])
+    if position == len(index['lists']):
+        return None
+    return index['lists'][position]
+
+
+def list_items(index, key):
+    """Textos dos <li> da lista da seção"""
+    items = list_after_marker(index, key)
+    if items is None:
+        return []
+    return [element_text(li).strip() for li in items.iter('li')]
+
+
+def marker_value(index, key):
+    """Valor após o rótulo do próprio marcador (foco, sponsor)"""
+    marker = index['markers'].get(key)
+    if marker is None:
+        return ""
+    match = MARKER_VALUE_PATTERNS[key].search(element_text(marker[1]))
+    return match.group(1).strip() if match else ""
+
+
+def extract_kpis(index):
     kpis = {}
-    for card in kpi_cards:
-        label_elem = card.find('p', class_='text-sm')
-        value_elem = card.find('p', class_=re.compile(r'text-lg|text-xl'))
-        if label_elem and value_elem:
-            label = label_elem.text.strip()
-            value = value_elem.text.strip()
-            kpis[label] = value
-    
-    # Extrair gaps prioritários
-    gaps_section = soup.find('p', string=re.compile(r'Gaps Prioritários a Desenvolver:'))
+    for card in index['kpi_cards']:
+        label_elem = value_elem = None
+        for p in card.iter('p'):
+            if label_elem is None and has_class(p, KPI_LABEL_CLASS):
+                label_elem = p
+            if value_elem is None and any(KPI_VALUE_CLASS_PATTERN.search(token) for token in class_tokens(p)):
+                value_elem = p
+            if label_elem is not None and value_elem is not None:
+                break
+        if label_elem is not None and value_elem is not None:
+            kpis[element_text(label_elem).strip()] = element_text(value_elem).strip()
+    return kpis
+
+
+def extract_gaps(index):
     gaps = []
-    if gaps_section:
-        gaps_list = gaps_section.find_next('ul')
-        if gaps_list:
-            for li in gaps_list.find_all('li'):
-                gap_text = li.text.strip()
-                # Separar título e descrição
-                gap_match = re.match(r'(.+?):\s*(.+)', gap_text)
-                if gap_match:
-                    gaps.append({
-                        'titulo': gap_match.group(1).strip(),
-                        'descricao': gap_match.group(2).strip()
-                    })
-                else:
-                    gaps.append({
-                        'titulo': gap_text[:50] + '...' if len(gap_text) > 50 else gap_text,
-                        'descricao': gap_text
-                    })
-    
-    # Extrair plano de ação (70-20-10)
-    plano_acao = {
-        '70_pratica': [],
-        '20_social': [],
-        '10_formal': []
-    }
-    
-    # 70% - Prática
-    pratica_section = soup.find('p', string=re.compile(r'70% - Aprendizado na Prática'))
-    if pratica_section:
-        pratica_list = pratica_section.find_next('ul')
-        if pratica_list:
-            plano_acao['70_pratica'] = [li.text.strip() for li in pratica_list.find_all('li')]
-    
-    # 20% - Social
-    social_section = soup.find('p', string=re.compile(r'20% - Aprendizado com Outros'))
-    if social_section:
-        social_list = social_section.find_next('ul')
-        if social_list:
-            plano_acao['20_social'] = [li.text.strip() for li in social_list.find_all('li')]
-    
-    # 10% - Formal
-    formal_section = soup.find('p', string=re.compile(r'10% - Aprendizado Formal'))
-    if formal_section:
-        formal_list = formal_section.find_next('ul')
-        if formal_list:
-            plano_acao['10_formal'] = [li.text.strip() for li in formal_list.find_all('li')]
-    
-    # Extrair estratégia de remuneração
-    remuneracao = {}
-    rem_table = soup.find('table')
-    if rem_table:
-        tbody = rem_table.find('tbody')
-        if tbody:
-            row = tbody.find('tr')
-            if row:
-                cells = row.find_all('td')
-                if len(cells) >= 4:
-                    remuneracao = {
-                        'movimento': cells[0].text.strip(),
-                        'mecanismo': cells[1].text.strip(),
-                        'novo_salario': cells[2].text.strip(),
-                        'justificativa': cells[3].text.strip()
-                    }
-    
-    # Extrair responsabilidades
-    responsabilidades = {
-        'colaborador': [],
-        'lideranca': [],
-        'dho': []
+    for gap_text in list_items(index, 'gaps'):
+        # Separar título e descrição
+        gap_match = GAP_PATTERN.match(gap_text)
+        if gap_match:
+            gaps.append({
+                'titulo': gap_match.group(1).strip(),
+                'descricao': gap_match.group(2).strip()
+            })
+        else:
+            gaps.append({
+                'titulo': gap_text[:50] + '...' if len(gap_text) > 50 else gap_text,
+                'descricao': gap_text
+            })
+    return gaps
+
+
+def extract_remuneracao(index):
+    """Primeira linha do corpo da primeira tabela do documento"""
+    table = index['table']
+    if table is None:
+        return {}
+    tbody = next(table.iter('tbody'), None)
+    row = next(tbody.iter('tr'), None) if tbody is not None else None
+    if row is None:
+        return {}
+    cells = list(row.iter('td'))
+    if len(cells) < 4:
+        return {}
+    return {
+        'movimento': element_text(cells[0]).strip(),
+        'mecanismo': element_text(cells[1]).strip(),
+        'novo_salario': element_text(cells[2]).strip(),
+        'justificativa': element_text(cells[3]).strip()
     }
-    
-    # Responsabilidades do colaborador
-    colab_section = soup.find('p', string=re.compile(r'Responsabilidades de .+ \(O Protagonista\)'))
-    if colab_section:
-        colab_list = colab_section.find_next('ul')
-        if colab_list:
-            responsabilidades['colaborador'] = [li.text.strip() for li in colab_list.find_all('li')]
-    
-    # Responsabilidades da liderança
-    lid_section = soup.find('p', string=re.compile(r'Responsabilidades da Liderança'))
-    if lid_section:
-        lid_list = lid_section.find_next('ul')
-        if lid_list:
-            responsabilidades['lideranca'] = [li.text.strip() for li in lid_list.find_all('li')]
-    
-    # Responsabilidades do DHO
-    dho_section = soup.find('p', string=re.compile(r'Responsabilidades do DHO'))
-    if dho_section:
-        dho_list = dho_section.find_next('ul')
-        if dho_list:
-            responsabilidades['dho'] = [li.text.strip() for li in dho_list.find_all('li')]
-    
-    # Montar estrutura de dados
-    pdi_data = {
-        'nome': nome,
-        'cargo': cargo,
-        'foco_desenvolvimento': foco,
-        'diretor_sponsor': sponsor,
-        'kpis': kpis,
-        'gaps_prioritarios': gaps,
-        'plano_acao': plano_acao,
-        'estrategia_remuneracao': remuneracao,
-        'responsabilidades': responsabilidades,
+
+
+def extract_pdi(html_content, html_path):
+    """
+    Extrai os dados estruturados do conteúdo HTML de um PDI
+    """
+    root = html.document_fromstring(html_content.encode('utf-8'), parser=_PARSER)
+    index = index_document(root)
+
+    title = element_text(index['title']) if index['title'] is not None else ""
+    nome_match = TITLE_NAME_PATTERN.search(title)
+    cargo = index['cargo']
+
+    return {
+        'nome': nome_match.group(1).strip() if nome_match else "",
+        'cargo': element_text(cargo).strip() if cargo is not None else "",
+        'foco_desenvolvimento': marker_value(index, 'foco'),
+        'diretor_sponsor': marker_value(index, 'sponsor'),
+        'kpis': extract_kpis(index),
+        'gaps_prioritarios': extract_gaps(index),
+        'plano_acao': {key: list_items(index, key) for key in PLANO_ACAO_SECTIONS},
+        'estrategia_remuneracao': extract_remuneracao(index),
+        'responsabilidades': {key: list_items(index, key) for key in RESPONSABILIDADES_SECTIONS},
         'html_original': str(html_path)
     }
-    
+
+
+def decode_html(content):
+    """Bytes do arquivo como texto, equivalente a open(..., 'r', encoding='utf-8').read()"""
+    return content.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def parse_pdi_html(html_path, use_cache=True, prune=True):
+    """
+    Extrai dados estruturados de um arquivo HTML de PDI
+
+    Com o cache ativo, um arquivo já extraído pela mesma PARSER_VERSION é
+    devolvido sem reprocessar. `prune=False` adia a limpeza do cache.
+    """
+    with open(html_path, 'rb') as f:
+        content = f.read()
+
+    if not (use_cache and pdi_cache.CACHE_ENABLED):
+        return extract_pdi(decode_html(content), html_path)
+
+    key = pdi_cache.cache_key(content, PARSER_VERSION)
+    pdi_data = pdi_cache.load_cached(key)
+    if pdi_data is None:
+        pdi_data = extract_pdi(decode_html(content), html_path)
+        pdi_cache.store_cached(key, pdi_data, prune=prune)
+
+    # O mesmo conteúdo pode estar em outro caminho
+    pdi_data['html_original'] = str(html_path)
     return pdi_data
 
 
-if __name__ == '__main__':
+def parse_pdi_file_safe(html_path, use_cache=True):
+    """parse_pdi_html que devolve o erro como registro em vez de propagá-lo"""
+    try:
+        return parse_pdi_html(html_path, use_cache=use_cache, prune=False)
+    except Exception as e:
+        return {'html_original': str(html_path), 'erro': f"{type(e).__name__}: {e}"}
+
+
+def resolve_inputs(inputs):
+    """
+    Arquivos HTML a processar, sem repetição e em ordem: diretórios viram seus
+    *.html (recursivo), padrões glob são expandidos e arquivos são usados como estão.
+    """
+    paths = []
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(str(path) for path in Path(item).rglob('*.html'))
+        elif glob.has_magic(item):
+            matches = sorted(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+        else:
+            matches = [item]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def iter_parsed_pdis(paths, workers=None, ordered=False, use_cache=True):
+    """
+    Gera os resultados de parse_pdi_file_safe para `paths`. Com mais de um
+    processo, os resultados saem na ordem em que ficam prontos (ou na ordem de
+    entrada, com `ordered`).
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    parse = partial(parse_pdi_file_safe, use_cache=use_cache)
+    if workers <= 1:
+        for path in paths:
+            yield parse(path)
+        return
+
+    # Lotes pequenos: equilibram a carga sem segurar resultados prontos
+    chunksize = max(1, min(16, len(paths) // (workers * 4)))
+    with Pool(workers) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        yield from mapper(parse, paths, chunksize=chunksize)
+
+
+def serialize_ndjson_line(obj):
+    """Serializa um objeto como uma linha NDJSON (bytes), com orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def write_pdis_ndjson(results, output):
+    """
+    Grava um PDI por linha em `output` (arquivo binário), com flush a cada
+    linha. Retorna (processados, com erro).
+    """
+    total = 0
+    failed = 0
+    for data in results:
+        output.write(serialize_ndjson_line(data))
+        output.flush()
+        total += 1
+        if 'erro' in data:
+            failed += 1
+            print(f"✗ {data['html_original']}: {data['erro']}", file=sys.stderr)
+    return total, failed
+
+
+def run_batch(inputs, output=None, workers=None, ordered=False, use_cache=True):
+    """Modo em lote: NDJSON em `output` (ou na saída padrão). Retorna (processados, com erro)."""
+    paths = resolve_inputs(inputs)
+    print(f"Arquivos encontrados: {len(paths)}", file=sys.stderr)
+
+    results = iter_parsed_pdis(paths, workers=workers, ordered=ordered, use_cache=use_cache)
+    if output:
+        with open(output, 'wb') as f:
+            total, failed = write_pdis_ndjson(results, f)
+    else:
+        total, failed = write_pdis_ndjson(results, sys.stdout.buffer)
+
+    if use_cache and pdi_cache.CACHE_ENABLED:
+        pdi_cache.prune_cache()
+
+    print(f"\n✓ PDIs processados: {total - failed}", file=sys.stderr)
+    if failed:
+        print(f"✗ PDIs com erro: {failed}", file=sys.stderr)
+    if output:
+        print(f"Resultados salvos em: {output}", file=sys.stderr)
+    return total, failed
+
+
+def process_sample_files(use_cache=True):
+    """Processa os PDIs de exemplo do repositório e grava pdi_data.json"""
     # Processar os dois arquivos
     files = [
         'PDI_Wilson3.html',
         'PDI_Fernando9.html'
     ]
-    
+
     results = []
     for filename in files:
         filepath = Path(__file__).parent / filename
         if filepath.exists():
             print(f"Processando {filename}...")
-            data = parse_pdi_html(filepath)
+            data = parse_pdi_html(filepath, use_cache=use_cache)
             results.append(data)
             print(f"✓ {data['nome']} - {data['cargo']}")
         else:
             print(f"✗ Arquivo não encontrado: {filename}")
-    
+
     # Salvar resultados em JSON
     output_path = Path(__file__).parent / 'pdi_data.json'
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
-    
+
     print(f"\n✓ Dados extraídos salvos em: {output_path}")
     print(f"Total de PDIs processados: {len(results)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extrai dados estruturados de PDIs em HTML")
+    parser.add_argument('inputs', nargs='*',
+                        help="Arquivos, diretórios ou padrões glob (sem argumentos: PDIs de exemplo -> pdi_data.json)")
+    parser.add_argument('--output', default=None, help="Arquivo NDJSON de saída (padrão: saída padrão)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processos paralelos (padrão: número de núcleos; 1 processa em série)")
+    parser.add_argument('--ordered', action='store_true',
+                        help="Grava os resultados na ordem dos arquivos, e não na ordem de conclusão")
+    parser.add_argument('--no-cache', action='store_true', help="Reprocessa todos os arquivos, sem usar o cache")
+    args = parser.parse_args()
+
+    if not args.inputs:
+        process_sample_files(use_cache=not args.no_cache)
+        sys.exit(0)
+
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers deve ser maior que zero")
+
+    _, failed = run_batch(args.inputs, output=args.output, workers=args.workers, ordered=args.ordered,
+                          use_cache=not args.no_cache)
+    if failed:
+        sys.exit(1)
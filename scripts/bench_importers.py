@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos importadores Python
+Sistema AVD UISA
+
+Gera planilhas sintéticas com os mesmos layouts dos exports do RH e mede, de
+ponta a ponta, cada importador em 1 mil, 10 mil e 100 mil linhas:
+
+    import_employees   scripts/import_employees.main + aplicação do SQL gerado
+                       (planilha de hierarquia, colunas [Chapa Coordenador]...)
+    import_hierarchy   import_hierarchy_data de import-hierarchy.py
+                       (planilha de hierarquia)
+    diretoria          scripts/import-diretoria-tai.py --apply
+                       (planilha DIRETORIATAI)
+    process_excel      process_excel de import-employees.py
+                       (planilha CHAPA/NOME/CARGO/...)
+
+Cada caso roda em um processo próprio, com o cache de planilhas desligado
+(EXCEL_CACHE=0), e registra tempo total, pico de memória (RSS) e quantidade
+de comandos enviados ao MySQL (variação de Questions no servidor: use um
+banco local dedicado, sem outros clientes). Os casos rodam na ordem acima,
+pois import_hierarchy depende dos funcionários gravados por import_employees.
+
+Para que o resultado não dependa do que execuções anteriores deixaram no
+banco, antes de cada caso as tabelas que ele grava são esvaziadas (TRUNCATE):
+employees, employeeHierarchy, departments e positions antes de
+import_employees e diretoria, e só employeeHierarchy antes de import_hierarchy.
+NUNCA rode o benchmark contra um banco com dados reais; --keep-db desliga a
+limpeza (o relatório registra se ela foi feita).
+
+O banco precisa ter o schema do sistema (pnpm db:push) e DATABASE_URL
+configurada. Com --no-db só os casos sem banco são medidos (process_excel e a
+geração do SQL/JSON dos demais).
+
+As planilhas geradas ficam em --workdir e são reaproveitadas entre execuções
+com o mesmo tamanho e semente. O resultado é gravado em JSON (--output) para
+comparação entre versões.
+
+Uso:
+    python scripts/bench_importers.py                               # 1k, 10k e 100k
+    python scripts/bench_importers.py --sizes 1000 --cases process_excel,diretoria
+    python scripts/bench_importers.py --no-db --output bench.json
+    python scripts/bench_importers.py --keep-db                     # sem limpar as tabelas
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+REPO_DIR = SCRIPTS_DIR.parent
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_WORKDIR = '/tmp/avd-bench'
+DEFAULT_SEED = 42
+
+# Casos na ordem de execução e a planilha usada por cada um
+CASES = {
+    'import_employees': 'hierarchy',
+    'import_hierarchy': 'hierarchy',
+    'diretoria': 'diretoria',
+    'process_excel': 'employees',
+}
+
+# Casos que só fazem sentido com banco de dados
+DB_ONLY_CASES = ('import_hierarchy',)
+
+# Tabelas esvaziadas antes de cada caso (import_hierarchy mantém os
+# funcionários gravados por import_employees)
+RESET_TABLES = {
+    'import_employees': ('employeeHierarchy', 'employees', 'departments', 'positions'),
+    'import_hierarchy': ('employeeHierarchy',),
+    'diretoria': ('employeeHierarchy', 'employees', 'departments', 'positions'),
+    'process_excel': (),
+}
+
+# Layout da planilha funcionarioscomahierarquia.xlsx
+HIERARCHY_COLUMNS = [
+    'Empresa', 'Chapa', 'Nome', 'Email', '[Código Seção]', 'Seção', '[Código Função]', 'Função',
+    '[Chapa Presidente]', 'Presidente', '[Função Presidente]', '[Email Presidente]',
+    '[Chapa Diretor]', 'Diretor', '[Função Diretor]', '[Email Diretor]',
+    '[Chapa Gestor]', 'Gestor', '[Função Gestor]', '[Email Gestor]',
+    '[Chapa Coordenador]', 'Coordenador', '[Função Coordenador]', '[Email Coordenador]',
+]
+
+# Layout das planilhas de funcionários e DIRETORIATAI.xlsx
+EMPLOYEE_COLUMNS = [
+    'CHAPA', 'NOME', 'CARGO', 'EMAILPESSOAL', 'EMAILCORPORATIVO', 'TELEFONE',
+    'CODSEÇÃO', 'SEÇÃO', 'CODFUNÇÃO', 'FUNÇÃO', 'SITUAÇÃO', 'GERENCIA', 'DIRETORIA',
+]
+
+COMPANY = 'USINA ITAMARATI S/A'
+DIRETORIA_TAI = 'DIRETORIA TAI'
+
+# Nível da árvore de seed_demo -> coluna de líder da planilha de hierarquia
+LEADER_LEVELS = {
+    'diretoria': 'diretor',
+    'gerencia': 'gestor',
+    'coordenacao': 'coordenador',
+}
+
+
+def load_module(name, path):
+    """Importa um script pelo caminho (nomes com hífen não são importáveis)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ============================================
+# PLANILHAS SINTÉTICAS
+# ============================================
+
+def build_people(rows, seed):
+    """
+    Funcionários sintéticos sobre a árvore organizacional de seed_demo. Cada
+    pessoa recebe chapa, nome, email, seção, função e os líderes acima dela
+    (presidente, diretor, gestor e coordenador, com o nível de cima quando o
+    próprio nível não existe na cadeia).
+    """
+    from seed_demo import AREAS, FIRST_NAMES, LAST_NAMES, build_org
+
+    rng = random.Random(seed)
+    org = build_org(rows, rng)
+
+    people = []
+    for node in org:
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        code, title, _ = node['position']
+        if node['index'] == 0:
+            code, title = 'PRE', 'Presidente'
+
+        department_index = node['department_index']
+        area = AREAS[department_index % len(AREAS)] if department_index is not None else 'Presidência'
+        chapa = f"{node['index'] + 1:06d}"
+
+        people.append({
+            'chapa': chapa,
+            'name': f"{first} {rng.choice(LAST_NAMES)} {last}".upper(),
+            'email': f"{first.lower()}.{last.lower()}{node['index'] + 1}@uisa.com.br",
+            'section_code': f"1000{(department_index or 0) + 1:06d}",
+            'section': f"{area} {(department_index or 0) + 1}",
+            'function_code': f"{code}{node['index'] % 7 + 1:03d}",
+            'function': title,
+            'manager_index': node['manager_index'],
+            'level': node['level'],
+            'area': area,
+        })
+
+    for person in people:
+        leaders = {'presidente': people[0]}
+        manager_index = person['manager_index']
+        while manager_index is not None:
+            manager = people[manager_index]
+            column = LEADER_LEVELS.get(manager['level'])
+            if manager_index != 0 and column and column not in leaders:
+                leaders[column] = manager
+            manager_index = manager['manager_index']
+        leaders.setdefault('diretor', leaders['presidente'])
+        leaders.setdefault('gestor', leaders['diretor'])
+        leaders.setdefault('coordenador', leaders['gestor'])
+        person['leaders'] = leaders
+    return people
+
+
+def hierarchy_records(people):
+    """Linhas da planilha de hierarquia"""
+    for person in people:
+        row = [COMPANY, person['chapa'], person['name'], person['email'],
+               person['section_code'], person['section'], person['function_code'], person['function']]
+        for column in ('presidente', 'diretor', 'gestor', 'coordenador'):
+            leader = person['leaders'][column]
+            row.extend([leader['chapa'], leader['name'], leader['function'], leader['email']])
+        yield row
+
+
+def employee_records(people, diretoria=None):
+    """Linhas das planilhas CHAPA/NOME/CARGO/... (todas na mesma diretoria com `diretoria`)"""
+    for index, person in enumerate(people):
+        yield [
+            person['chapa'],
+            person['name'],
+            person['function'],
+            f"pessoal{index + 1}@gmail.com",
+            person['email'] if index % 10 else 'Endereçoeletrônico@uisa.com.br',
+            f"(67) 9{index % 10000:04d}-{index // 10000 % 10000:04d}",
+            person['section_code'],
+            person['section'],
+            person['function_code'],
+            person['function'],
+            'Ativo' if index % 25 else 'Afastado',
+            person['leaders']['gestor']['section'],
+            diretoria or f"DIRETORIA {person['area'].upper()}",
+        ]
+
+
+def generate_workbook(path, layout, rows, seed):
+    """Grava a planilha sintética de `layout` com `rows` linhas"""
+    import pandas as pd
+
+    people = build_people(rows, seed)
+    if layout == 'hierarchy':
+        df = pd.DataFrame(hierarchy_records(people), columns=HIERARCHY_COLUMNS)
+    elif layout == 'diretoria':
+        df = pd.DataFrame(employee_records(people, DIRETORIA_TAI), columns=EMPLOYEE_COLUMNS)
+    else:
+        df = pd.DataFrame(employee_records(people), columns=EMPLOYEE_COLUMNS)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp.xlsx')
+    df.to_excel(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def ensure_workbook(workdir, layout, rows, seed):
+    """Caminho da planilha sintética, gerada apenas se ainda não existir"""
+    path = Path(workdir) / 'workbooks' / f"{layout}-{rows}-s{seed}.xlsx"
+    if not path.exists():
+        started = time.perf_counter()
+        print(f"  Gerando {path.name}...", flush=True)
+        generate_workbook(path, layout, rows, seed)
+        print(f"  ✓ {path.name} ({time.perf_counter() - started:.1f}s)", flush=True)
+    return path
+
+
+# ============================================
+# CASOS (executados no processo worker)
+# ============================================
+
+def iter_sql_statements(sql_file):
+    """Comandos do arquivo SQL gerado por import_employees (um ';' no fim da linha encerra o comando)"""
+    statement = []
+    with open(sql_file, encoding='utf-8') as f:
+        for line in f:
+            if not statement and (not line.strip() or line.startswith('--')):
+                continue
+            statement.append(line)
+            if line.rstrip().endswith(';'):
+                yield ''.join(statement)
+                statement = []
+
+
+def apply_sql_file(sql_file):
+    """Executa o arquivo SQL gerado, na mesma sessão (usa tabelas temporárias)"""
+    from avd_db import get_connection
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for statement in iter_sql_statements(sql_file):
+            cursor.execute(statement)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def run_import_employees(workbook, outdir, use_db):
+    module = load_module('import_employees', SCRIPTS_DIR / 'import_employees.py')
+    module.INPUT_FILE = str(workbook)
+    module.OUTPUT_DIR = str(outdir)
+    module.main()
+    if use_db:
+        apply_sql_file(outdir / 'import_data.sql')
+
+
+def run_import_hierarchy(workbook, outdir, use_db):
+    module = load_module('import_hierarchy', REPO_DIR / 'import-hierarchy.py')
+    module.import_hierarchy_data(str(workbook))
+
+
+def run_diretoria(workbook, outdir, use_db):
+    module = load_module('import_diretoria_tai', SCRIPTS_DIR / 'import-diretoria-tai.py')
+    module.OUTPUT_JSON = str(outdir / 'diretoria-tai-data.json')
+    module.OUTPUT_SQL = str(outdir / 'import-diretoria-tai.sql')
+    sys.argv = ['import-diretoria-tai.py', str(workbook)] + (['--apply'] if use_db else [])
+    module.main()
+
+
+def run_process_excel(workbook, outdir, use_db):
+    module = load_module('import_employees_excel', REPO_DIR / 'import-employees.py')
+    module.process_excel(str(workbook))
+
+
+CASE_RUNNERS = {
+    'import_employees': run_import_employees,
+    'import_hierarchy': run_import_hierarchy,
+    'diretoria': run_diretoria,
+    'process_excel': run_process_excel,
+}
+
+
+def server_questions():
+    """Contador global de comandos recebidos pelo servidor"""
+    from avd_db import get_connection
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        value = int(cursor.fetchone()[1])
+        cursor.close()
+        return value
+    finally:
+        conn.close()
+
+
+def peak_rss_mb():
+    """
+    Pico de memória residente do processo. No Linux usa VmHWM, que é zerado no
+    exec: ru_maxrss herdaria o pico do processo pai (que gerou as planilhas).
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss em KB no Linux, em bytes no macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_worker(case, workbook, outdir, result_file, use_db):
+    """Executa um caso e grava o resultado em `result_file`"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    result = {'status': 'ok', 'error': None, 'queries': None}
+    questions_before = server_questions() if use_db else None
+
+    started = time.perf_counter()
+    try:
+        CASE_RUNNERS[case](Path(workbook), outdir, use_db)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            result.update(status='error', error=f"sys.exit({e.code})")
+    except Exception as e:
+        result.update(status='error', error=f"{type(e).__name__}: {e}")
+    result['wall_seconds'] = round(time.perf_counter() - started, 3)
+    result['peak_rss_mb'] = peak_rss_mb()
+
+    if use_db:
+        # Desconta o próprio SHOW GLOBAL STATUS da primeira leitura
+        result['queries'] = server_questions() - questions_before - 1
+
+    with open(result_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+# ============================================
+# ORQUESTRAÇÃO
+# ============================================
+
+def reset_tables(tables):
+    """Esvazia as tabelas antes de um caso (fora do processo medido)"""
+    from avd_db import get_connection
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for table in tables:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def run_case(case, rows, workbook, workdir, use_db, reset_db):
+    """Executa o caso em um processo separado e devolve o resultado"""
+    db_reset = list(RESET_TABLES[case]) if use_db and reset_db else []
+    if db_reset:
+        reset_tables(db_reset)
+
+    case_dir = Path(workdir) / 'runs' / f"{case}-{rows}"
+    case_dir.mkdir(parents=True, exist_ok=True)
+    result_file = case_dir / 'result.json'
+    log_file = case_dir / 'output.log'
+    if result_file.exists():
+        result_file.unlink()
+
+    command = [sys.executable, __file__, '--worker', case, '--input', str(workbook),
+               '--result', str(result_file), '--workdir', str(case_dir)]
+    if not use_db:
+        command.append('--no-db')
+
+    env = dict(os.environ, EXCEL_CACHE='0')
+    with open(log_file, 'w', encoding='utf-8') as log:
+        process = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, env=env)
+
+    if result_file.exists():
+        with open(result_file, encoding='utf-8') as f:
+            result = json.load(f)
+    else:
+        result = {'status': 'error', 'error': f"worker terminou com código {process.returncode}",
+                  'wall_seconds': None, 'peak_rss_mb': None, 'queries': None}
+
+    result.update(case=case, rows=rows, db_reset=db_reset, log=str(log_file))
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result):
+    if result['status'] != 'ok':
+        print(f"  ✗ {result['case']:<17} {result['rows']:>7} linhas: {result['error']} (log: {result['log']})")
+        return
+    queries = f"{result['queries']:>7} queries" if result['queries'] is not None else ''
+    print(f"  ✓ {result['case']:<17} {result['rows']:>7} linhas: {result['wall_seconds']:>8.2f}s "
+          f"{result['peak_rss_mb']:>8.1f} MB {queries}")
+
+
+def parse_list(value, cast=str):
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos importadores com planilhas sintéticas")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Quantidades de linhas, separadas por vírgula (padrão: 1000,10000,100000)")
+    parser.add_argument('--cases', default=','.join(CASES),
+                        help=f"Casos a medir, separados por vírgula (padrão: {','.join(CASES)})")
+    parser.add_argument('--workdir', default=DEFAULT_WORKDIR,
+                        help=f"Diretório das planilhas e saídas (padrão: {DEFAULT_WORKDIR})")
+    parser.add_argument('--output', default=None, help="Arquivo JSON de resultado (padrão: <workdir>/results.json)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f"Semente das planilhas (padrão: {DEFAULT_SEED})")
+    parser.add_argument('--no-db', action='store_true', help="Não acessa o banco de dados")
+    parser.add_argument('--keep-db', action='store_true',
+                        help="Não esvazia as tabelas gravadas pelos importadores antes de cada caso")
+    # Uso interno: execução de um único caso no processo filho
+    parser.add_argument('--worker', choices=list(CASES), help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    use_db = not args.no_db
+    reset_db = use_db and not args.keep_db
+
+    if args.worker:
+        run_worker(args.worker, args.input, args.workdir, args.result, use_db)
+        return
+
+    sizes = parse_list(args.sizes, int)
+    cases = parse_list(args.cases)
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        print(f"✗ Casos desconhecidos: {', '.join(unknown)} (disponíveis: {', '.join(CASES)})")
+        sys.exit(1)
+    # Mantém a ordem de dependência entre os casos
+    cases = [case for case in CASES if case in cases]
+    if not use_db:
+        cases = [case for case in cases if case not in DB_ONLY_CASES]
+
+    if reset_db and 'import_hierarchy' in cases and 'import_employees' not in cases:
+        # Sem import_employees no mesmo tamanho, a hierarquia usaria os funcionários de outra execução
+        print("✗ import_hierarchy depende de import_employees: inclua os dois em --cases (ou use --keep-db)")
+        sys.exit(1)
+
+    if use_db and not os.environ.get('DATABASE_URL'):
+        print("✗ DATABASE_URL não configurada (use --no-db para medir sem banco)")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("BENCHMARK DOS IMPORTADORES")
+    print("=" * 60)
+    print(f"Tamanhos: {sizes}")
+    print(f"Casos: {cases}")
+    print(f"Banco de dados: {'sim' if use_db else 'não'}")
+    if reset_db:
+        print("⚠ As tabelas employees, employeeHierarchy, departments e positions são esvaziadas antes de cada caso")
+
+    results = []
+    for rows in sizes:
+        print(f"\n--- {rows} linhas ---")
+        for case in cases:
+            workbook = ensure_workbook(args.workdir, CASES[case], rows, args.seed)
+            result = run_case(case, rows, workbook, args.workdir, use_db, reset_db)
+            print_result(result)
+            results.append(result)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'database': use_db,
+        'db_reset': reset_db,
+        'results': results,
+    }
+
+    output = Path(args.output or Path(args.workdir) / 'results.json')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n✓ Resultados gravados em {output}")
+    if any(result['status'] != 'ok' for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Limpeza dos caches em disco dos scripts
+Sistema AVD UISA
+
+Regras comuns a excel_cache.py e pdi_cache.py: entradas sem uso há mais que a
+idade máxima saem primeiro e, se o diretório ainda passar do tamanho máximo,
+as menos recentemente usadas (menor mtime) são removidas até caber no limite.
+Arquivos temporários (*.tmp) deixados por um processo interrompido durante a
+gravação também são removidos.
+"""
+
+import time
+
+TMP_SUFFIX = '.tmp'
+
+# Temporários mais novos que isto podem ser de uma gravação em andamento
+TMP_MAX_AGE_SECONDS = 3600
+
+
+def prune_directory(cache_dir, suffixes, max_bytes, max_age_seconds, tmp_max_age_seconds=TMP_MAX_AGE_SECONDS):
+    """
+    Aplica os limites de idade e tamanho às entradas de `cache_dir` com um dos
+    `suffixes` e remove temporários abandonados.
+
+    Retorna a quantidade de entradas removidas (sem contar os temporários).
+    """
+    if not cache_dir.exists():
+        return 0
+
+    now = time.time()
+    entries = []
+    removed = 0
+
+    for entry in cache_dir.iterdir():
+        try:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+        except FileNotFoundError:
+            # Removida por outro processo durante a varredura
+            continue
+
+        if entry.suffix == TMP_SUFFIX:
+            if now - stat.st_mtime > tmp_max_age_seconds:
+                entry.unlink(missing_ok=True)
+            continue
+        if entry.suffix not in suffixes:
+            continue
+
+        if now - stat.st_mtime > max_age_seconds:
+            entry.unlink(missing_ok=True)
+            removed += 1
+        else:
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda item: item[0]):
+        if total_bytes <= max_bytes:
+            break
+        entry.unlink(missing_ok=True)
+        total_bytes -= size
+        removed += 1
+
+    return removed
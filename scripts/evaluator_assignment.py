@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Atribuição de avaliadores 360° para um ciclo
+Sistema AVD UISA
+
+Percorre o grafo de gestores (employees.managerId) uma única vez e calcula,
+para cada funcionário ativo, os avaliadores:
+    - self: o próprio funcionário
+    - manager: o gestor direto (se ativo)
+    - peer: colegas com o mesmo gestor, limitados a --max-peers
+    - subordinate: subordinados diretos, limitados a --max-subordinates
+
+Quando há mais pares/subordinados que o limite, a amostra é sorteada com uma
+semente derivada de --seed e do id do funcionário: a mesma execução gera
+sempre as mesmas atribuições, e incluir um funcionário novo não altera o
+sorteio dos demais.
+
+As atribuições são gravadas em lote em evaluation360CycleParticipants (ciclo
+de evaluationCycles: managerId, peerIds, subordinateIds) e, com
+--feedback-cycle-id, também em feedback360Participants/feedback360Evaluators
+(ciclo de feedback360Cycles). Funcionários que já participam do ciclo são
+mantidos; --replace recria as participações do ciclo de avaliação.
+
+Uso:
+    python scripts/evaluator_assignment.py --cycle-id 12
+    python scripts/evaluator_assignment.py --cycle-id 12 --feedback-cycle-id 3 --seed 2025
+"""
+
+import argparse
+import json
+import random
+import sys
+from collections import defaultdict
+
+DEFAULT_MAX_PEERS = 3
+DEFAULT_MAX_SUBORDINATES = 5
+DEFAULT_SEED = 2025
+BATCH_SIZE = 1000
+
+INSERT_CYCLE_PARTICIPANT_SQL = """
+    INSERT INTO evaluation360CycleParticipants (
+        cycleId, employeeId, participationType, managerId, peerIds, subordinateIds,
+        status, createdAt, updatedAt
+    ) VALUES (%s, %s, %s, %s, %s, %s, 'pending', NOW(), NOW())
+"""
+
+INSERT_FEEDBACK_PARTICIPANT_SQL = """
+    INSERT INTO feedback360Participants (cycleId, employeeId, status, invitedAt, createdAt, updatedAt)
+    VALUES (%s, %s, 'invited', NOW(), NOW(), NOW())
+"""
+
+INSERT_FEEDBACK_EVALUATOR_SQL = """
+    INSERT INTO feedback360Evaluators (
+        participantId, evaluatorId, relationshipType, status, invitedAt, createdAt, updatedAt
+    ) VALUES (%s, %s, %s, 'pending', NOW(), NOW(), NOW())
+"""
+
+
+def load_active_manager_edges(cursor):
+    """(id, managerId) dos funcionários ativos"""
+    cursor.execute("SELECT id, managerId FROM employees WHERE active = 1")
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def _sample(candidates, limit, seed_key, skip=None):
+    """
+    Amostra ordenada de até `limit` ids de `candidates` (lista ordenada), sem o
+    elemento na posição `skip`. Sorteia posições, sem copiar a lista inteira;
+    o gerador (semeado com `seed_key`) só é criado quando há sorteio.
+    """
+    size = len(candidates) - (1 if skip is not None else 0)
+    if limit is None or size <= limit:
+        return [candidate for position, candidate in enumerate(candidates) if position != skip]
+
+    positions = random.Random(seed_key).sample(range(size), limit)
+    if skip is not None:
+        positions = [position + 1 if position >= skip else position for position in positions]
+    return sorted(candidates[position] for position in positions)
+
+
+def compute_assignments(edges, max_peers=DEFAULT_MAX_PEERS,
+                        max_subordinates=DEFAULT_MAX_SUBORDINATES, seed=DEFAULT_SEED):
+    """
+    Calcula as atribuições a partir de pares (id, managerId) de funcionários ativos.
+
+    Retorna uma lista, ordenada por employeeId, de dicts com employeeId, managerId,
+    peerIds e subordinateIds.
+    """
+    manager_of = dict(edges)
+
+    # Equipes diretas, em ordem de id; gestores inativos (fora de manager_of) não contam
+    children = defaultdict(list)
+    for employee_id in sorted(manager_of):
+        manager_id = manager_of[employee_id]
+        if manager_id in manager_of and manager_id != employee_id:
+            children[manager_id].append(employee_id)
+
+    # Posição de cada funcionário na equipe do seu gestor
+    team_position = {}
+    for team in children.values():
+        for position, employee_id in enumerate(team):
+            team_position[employee_id] = position
+
+    assignments = []
+    for employee_id in sorted(manager_of):
+        manager_id = manager_of[employee_id] if employee_id in team_position else None
+
+        peers = []
+        if manager_id:
+            peers = _sample(children[manager_id], max_peers, f"{seed}:{employee_id}:peer",
+                            skip=team_position[employee_id])
+
+        assignments.append({
+            'employeeId': employee_id,
+            'managerId': manager_id,
+            'peerIds': peers,
+            'subordinateIds': _sample(children.get(employee_id, []), max_subordinates,
+                                      f"{seed}:{employee_id}:subordinate"),
+        })
+
+    return assignments
+
+
+def participation_type(assignment, evaluators):
+    """'both' quando o funcionário também avalia alguém além de si mesmo"""
+    return 'both' if assignment['employeeId'] in evaluators else 'evaluated'
+
+
+def iter_evaluator_rows(assignment):
+    """(evaluatorId, relationshipType) de um participante"""
+    yield assignment['employeeId'], 'self'
+    if assignment['managerId']:
+        yield assignment['managerId'], 'manager'
+    for peer_id in assignment['peerIds']:
+        yield peer_id, 'peer'
+    for subordinate_id in assignment['subordinateIds']:
+        yield subordinate_id, 'subordinate'
+
+
+def _executemany_batched(cursor, sql, rows, batch_size=BATCH_SIZE):
+    # executemany gera um único INSERT multi-linha por lote
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[start:start + batch_size])
+
+
+def insert_cycle_participants(cursor, cycle_id, assignments, replace=False):
+    """
+    Grava evaluation360CycleParticipants do ciclo. Retorna a quantidade inserida.
+    """
+    if replace:
+        cursor.execute("DELETE FROM evaluation360CycleParticipants WHERE cycleId = %s", (cycle_id,))
+        existing = set()
+    else:
+        cursor.execute("SELECT employeeId FROM evaluation360CycleParticipants WHERE cycleId = %s", (cycle_id,))
+        existing = {row[0] for row in cursor.fetchall()}
+
+    evaluators = set()
+    for assignment in assignments:
+        evaluators.update(evaluator_id for evaluator_id, relationship in iter_evaluator_rows(assignment)
+                          if relationship != 'self')
+
+    rows = [
+        (
+            cycle_id,
+            assignment['employeeId'],
+            participation_type(assignment, evaluators),
+            assignment['managerId'],
+            json.dumps(assignment['peerIds']),
+            json.dumps(assignment['subordinateIds']),
+        )
+        for assignment in assignments
+        if assignment['employeeId'] not in existing
+    ]
+    _executemany_batched(cursor, INSERT_CYCLE_PARTICIPANT_SQL, rows)
+    return len(rows)
+
+
+def insert_feedback_evaluators(cursor, feedback_cycle_id, assignments):
+    """
+    Cria feedback360Participants para quem ainda não participa do ciclo de feedback
+    e os respectivos feedback360Evaluators. Retorna (participantes, avaliadores).
+    """
+    cursor.execute("SELECT employeeId FROM feedback360Participants WHERE cycleId = %s", (feedback_cycle_id,))
+    existing = {row[0] for row in cursor.fetchall()}
+
+    new_assignments = [a for a in assignments if a['employeeId'] not in existing]
+    if not new_assignments:
+        return 0, 0
+
+    _executemany_batched(cursor, INSERT_FEEDBACK_PARTICIPANT_SQL, [
+        (feedback_cycle_id, assignment['employeeId']) for assignment in new_assignments
+    ])
+
+    # Ids dos participantes recém-criados, pelo par (cycleId, employeeId)
+    cursor.execute("SELECT id, employeeId FROM feedback360Participants WHERE cycleId = %s", (feedback_cycle_id,))
+    participant_ids = {employee_id: participant_id for participant_id, employee_id in cursor.fetchall()}
+
+    rows = [
+        (participant_ids[assignment['employeeId']], evaluator_id, relationship)
+        for assignment in new_assignments
+        for evaluator_id, relationship in iter_evaluator_rows(assignment)
+    ]
+    _executemany_batched(cursor, INSERT_FEEDBACK_EVALUATOR_SQL, rows)
+    return len(new_assignments), len(rows)
+
+
+def assign_cycle_evaluators(conn, cycle_id, feedback_cycle_id=None, max_peers=DEFAULT_MAX_PEERS,
+                            max_subordinates=DEFAULT_MAX_SUBORDINATES, seed=DEFAULT_SEED, replace=False):
+    """
+    Calcula e grava as atribuições em uma transação. Retorna o dict de estatísticas.
+    """
+    from avd_db import transaction
+
+    with transaction(conn):
+        cursor = conn.cursor()
+        try:
+            assignments = compute_assignments(
+                load_active_manager_edges(cursor),
+                max_peers=max_peers, max_subordinates=max_subordinates, seed=seed
+            )
+
+            stats = {
+                'employees': len(assignments),
+                'with_manager': sum(1 for a in assignments if a['managerId']),
+                'peer_links': sum(len(a['peerIds']) for a in assignments),
+                'subordinate_links': sum(len(a['subordinateIds']) for a in assignments),
+                'cycle_participants': insert_cycle_participants(cursor, cycle_id, assignments, replace=replace),
+                'feedback_participants': 0,
+                'feedback_evaluators': 0,
+            }
+
+            if feedback_cycle_id is not None:
+                stats['feedback_participants'], stats['feedback_evaluators'] = \
+                    insert_feedback_evaluators(cursor, feedback_cycle_id, assignments)
+        finally:
+            cursor.close()
+
+    return stats
+
+
+def print_assignment_stats(stats):
+    """Imprime o resumo da atribuição"""
+    print(f"\nFuncionários ativos: {stats['employees']}")
+    print(f"Com gestor ativo: {stats['with_manager']}")
+    print(f"Vínculos de pares: {stats['peer_links']}")
+    print(f"Vínculos de subordinados: {stats['subordinate_links']}")
+    print(f"Participantes do ciclo criados: {stats['cycle_participants']}")
+    if stats['feedback_participants'] or stats['feedback_evaluators']:
+        print(f"Participantes de feedback 360° criados: {stats['feedback_participants']}")
+        print(f"Avaliadores de feedback 360° criados: {stats['feedback_evaluators']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atribui avaliadores 360° a todos os funcionários ativos")
+    parser.add_argument('--cycle-id', type=int, required=True, help="ID do ciclo em evaluationCycles")
+    parser.add_argument('--feedback-cycle-id', type=int, default=None,
+                        help="ID do ciclo em feedback360Cycles (grava também feedback360Evaluators)")
+    parser.add_argument('--max-peers', type=int, default=DEFAULT_MAX_PEERS,
+                        help=f"Máximo de pares por funcionário (padrão: {DEFAULT_MAX_PEERS})")
+    parser.add_argument('--max-subordinates', type=int, default=DEFAULT_MAX_SUBORDINATES,
+                        help=f"Máximo de subordinados avaliadores (padrão: {DEFAULT_MAX_SUBORDINATES})")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f"Semente do sorteio (padrão: {DEFAULT_SEED})")
+    parser.add_argument('--replace', action='store_true', help="Recria as participações existentes do ciclo")
+    args = parser.parse_args()
+
+    from avd_db import get_connection
+
+    print("=" * 60)
+    print("ATRIBUIÇÃO DE AVALIADORES 360°")
+    print("=" * 60)
+
+    conn = get_connection()
+    try:
+        stats = assign_cycle_evaluators(
+            conn, args.cycle_id, feedback_cycle_id=args.feedback_cycle_id,
+            max_peers=args.max_peers, max_subordinates=args.max_subordinates,
+            seed=args.seed, replace=args.replace
+        )
+        print_assignment_stats(stats)
+    except Exception as e:
+        print(f"\n✗ Erro ao atribuir avaliadores: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
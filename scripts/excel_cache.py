@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Cache de planilhas Excel já convertidas para DataFrame
+Sistema AVD UISA
+
+A leitura com openpyxl é a etapa mais lenta dos importadores. Este módulo guarda
+um snapshot tipado (Parquet) de cada planilha, identificado pelo SHA-256 do
+arquivo e pelo nome da aba: execuções seguintes, e as demais etapas do pipeline
+que leem o mesmo export do RH, carregam o DataFrame em milissegundos.
+
+Quando o pyarrow não está instalado, ou a planilha tem colunas com tipos
+misturados que o Parquet não representa, o snapshot é gravado em pickle.
+
+Variáveis de ambiente:
+    EXCEL_CACHE=0              desativa o cache
+    EXCEL_CACHE_DIR            diretório dos snapshots (padrão: ~/.cache/avd-uisa/excel)
+    EXCEL_CACHE_MAX_MB         tamanho máximo do cache (padrão: 512)
+    EXCEL_CACHE_MAX_AGE_DAYS   idade máxima de um snapshot sem uso (padrão: 30)
+
+Uso:
+    from excel_cache import read_excel_cached
+    df = read_excel_cached('funcionarios-hierarquia.xlsx')
+
+    python scripts/excel_cache.py --prune    # aplica os limites de tamanho/idade
+    python scripts/excel_cache.py --clear    # remove todos os snapshots
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from cache_eviction import prune_directory
+
+# Incrementar quando o formato dos snapshots mudar
+CACHE_FORMAT_VERSION = 1
+
+CACHE_ENABLED = os.environ.get('EXCEL_CACHE', '1') != '0'
+CACHE_DIR = Path(os.environ.get('EXCEL_CACHE_DIR', Path.home() / '.cache' / 'avd-uisa' / 'excel'))
+MAX_CACHE_BYTES = int(float(os.environ.get('EXCEL_CACHE_MAX_MB', '512')) * 1024 * 1024)
+MAX_AGE_SECONDS = int(float(os.environ.get('EXCEL_CACHE_MAX_AGE_DAYS', '30')) * 86400)
+
+SNAPSHOT_SUFFIXES = ('.parquet', '.pkl')
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_key(path, sheet_name, read_kwargs):
+    """Chave do snapshot: conteúdo do arquivo + aba + opções de leitura"""
+    options = repr(sorted(read_kwargs.items()))
+    options_digest = hashlib.sha256(f"{CACHE_FORMAT_VERSION}|{options}".encode('utf-8')).hexdigest()[:12]
+    sheet = re.sub(r'[^A-Za-z0-9_-]', '_', str(sheet_name))[:40]
+    return f"{file_sha256(path)}-{sheet}-{options_digest}"
+
+
+def _find_snapshot(key):
+    for suffix in SNAPSHOT_SUFFIXES:
+        candidate = CACHE_DIR / f"{key}{suffix}"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _load_snapshot(snapshot):
+    if snapshot.suffix == '.parquet':
+        return pd.read_parquet(snapshot)
+    return pd.read_pickle(snapshot)
+
+
+def _write_snapshot(df, key):
+    """Grava o snapshot de forma atômica; Parquet quando possível, senão pickle"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = CACHE_DIR / f".{key}.{os.getpid()}.tmp"
+
+    try:
+        try:
+            df.to_parquet(tmp_path, index=True)
+            target = CACHE_DIR / f"{key}.parquet"
+        except (ImportError, ValueError, TypeError, OverflowError):
+            # Sem pyarrow, ou colunas com tipos misturados (ex.: chapas numéricas e texto)
+            df.to_pickle(tmp_path)
+            target = CACHE_DIR / f"{key}.pkl"
+        os.replace(tmp_path, target)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    return target
+
+
+def read_excel_cached(path, sheet_name=0, **read_kwargs):
+    """
+    Equivalente a pd.read_excel(path, sheet_name=sheet_name, **read_kwargs)
+    que reutiliza o snapshot da planilha quando o arquivo não mudou.
+
+    `sheet_name=None` (todas as abas) não é cacheado.
+    """
+    if not CACHE_ENABLED or sheet_name is None or isinstance(sheet_name, list):
+        return pd.read_excel(path, sheet_name=sheet_name, **read_kwargs)
+
+    key = snapshot_key(path, sheet_name, read_kwargs)
+    snapshot = _find_snapshot(key)
+
+    if snapshot is not None:
+        try:
+            df = _load_snapshot(snapshot)
+            # Atualiza o mtime: a expiração considera o último uso
+            os.utime(snapshot)
+            return df
+        except Exception as e:
+            print(f"⚠ Snapshot de cache inválido ({snapshot.name}), relendo a planilha: {e}")
+            snapshot.unlink(missing_ok=True)
+
+    df = pd.read_excel(path, sheet_name=sheet_name, **read_kwargs)
+
+    try:
+        _write_snapshot(df, key)
+        prune_cache()
+    except OSError as e:
+        print(f"⚠ Não foi possível gravar o cache da planilha: {e}")
+
+    return df
+
+
+def prune_cache(max_bytes=MAX_CACHE_BYTES, max_age_seconds=MAX_AGE_SECONDS):
+    """
+    Remove snapshots sem uso há mais de `max_age_seconds` e, se o cache ainda
+    passar de `max_bytes`, os menos recentemente usados até caber no limite.
+
+    Temporários abandonados por gravações interrompidas também são removidos.
+
+    Retorna a quantidade de snapshots removidos.
+    """
+    return prune_directory(CACHE_DIR, SNAPSHOT_SUFFIXES, max_bytes, max_age_seconds)
+
+
+def clear_cache():
+    """Remove todos os snapshots do cache"""
+    return prune_cache(max_bytes=-1, max_age_seconds=-1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manutenção do cache de planilhas Excel")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--prune', action='store_true', help="Aplica os limites de tamanho e idade")
+    group.add_argument('--clear', action='store_true', help="Remove todos os snapshots")
+    args = parser.parse_args()
+
+    removed = clear_cache() if args.clear else prune_cache()
+    print(f"Snapshots removidos de {CACHE_DIR}: {removed}")
+    sys.exit(0)
@@ -1,10 +1,14 @@
 import pandas as pd
+import argparse
 import json
+import os
 import sys
 
+from excel_cache import read_excel_cached
+
 def process_sections(file_path):
     """Process sections/departments from Excel"""
-    df = pd.read_excel(file_path)
+    df = read_excel_cached(file_path)
     
     sections = []
     for idx, row in df.iterrows():
@@ -21,7 +25,7 @@ def process_sections(file_path):
 
 def process_employees(file_path):
     """Process employees from Excel"""
-    df = pd.read_excel(file_path)
+    df = read_excel_cached(file_path)
     
     employees = []
     for idx, row in df.iterrows():
@@ -45,27 +49,172 @@ def process_employees(file_path):
     
     return employees
 
+SECTIONS_FILE = '/home/ubuntu/upload/relaçãodeseções.XLSX'
+EMPLOYEES_FILE = '/home/ubuntu/upload/relaçãofuncionários.xlsx'
+OUTPUT_DIR = '/home/ubuntu/avd-uisa-sistema-completo/scripts'
+
+# CSV compatible with LOAD DATA ... FIELDS ENCLOSED BY '"' ESCAPED BY '':
+# strings are always quoted (quotes doubled), NULL is the bare word NULL
+LOAD_DATA_OPTIONS = """CHARACTER SET utf8mb4
+FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+LINES TERMINATED BY '\\n'
+IGNORE 1 LINES"""
+
+def csv_field(value):
+    """Format a value as a LOAD DATA friendly CSV field"""
+    if value is None or value == '':
+        return 'NULL'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+def write_csv(path, columns, rows):
+    """Write a header line plus one typed, escaped line per row"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(columns) + '\n')
+        for row in rows:
+            f.write(','.join(csv_field(value) for value in row) + '\n')
+
+def sql_path(path):
+    """Quote a file path for use in a SQL string literal"""
+    return "'" + os.path.abspath(path).replace('\\', '/').replace("'", "''") + "'"
+
+def write_loaddata_files(sections, employees, output_dir):
+    """
+    Write departments.csv, employees.csv and load_data.sql.
+    
+    The SQL script bulk-loads both CSVs into temporary staging tables with
+    LOAD DATA LOCAL INFILE and upserts them into departments/employees,
+    resolving employees.departmentId by section name.
+    Returns the path of the SQL script.
+    """
+    departments_csv = os.path.join(output_dir, 'departments.csv')
+    employees_csv = os.path.join(output_dir, 'employees.csv')
+    load_sql = os.path.join(output_dir, 'load_data.sql')
+    
+    write_csv(departments_csv, ['code', 'name', 'active'], (
+        (section['code'], section['name'], section['active']) for section in sections
+    ))
+    
+    write_csv(employees_csv, [
+        'employee_code', 'name', 'email', 'corporate_email', 'personal_email',
+        'position', 'department', 'phone', 'active'
+    ], (
+        (
+            emp['employee_code'], emp['name'],
+            emp['corporate_email'] or emp['personal_email'],
+            emp['corporate_email'], emp['personal_email'],
+            emp['position'], emp['department'], emp['phone'], emp['active']
+        )
+        for emp in employees
+    ))
+    
+    script = f"""-- Bulk load of sections and employees
+-- Run with: mysql --local-infile=1 <database> < {os.path.basename(load_sql)}
+SET NAMES utf8mb4;
+
+START TRANSACTION;
+
+-- Departments
+DROP TEMPORARY TABLE IF EXISTS stg_departments;
+CREATE TEMPORARY TABLE stg_departments (
+    code VARCHAR(50) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    active TINYINT(1) NOT NULL
+);
+
+LOAD DATA LOCAL INFILE {sql_path(departments_csv)}
+INTO TABLE stg_departments
+{LOAD_DATA_OPTIONS}
+(code, name, active);
+
+INSERT INTO departments (code, name, active, createdAt, updatedAt)
+SELECT code, name, active, NOW(), NOW() FROM stg_departments
+ON DUPLICATE KEY UPDATE name = VALUES(name), active = VALUES(active), updatedAt = NOW();
+
+-- Employees
+DROP TEMPORARY TABLE IF EXISTS stg_employees;
+CREATE TEMPORARY TABLE stg_employees (
+    employeeCode VARCHAR(50) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(320),
+    corporateEmail VARCHAR(320),
+    personalEmail VARCHAR(320),
+    cargo VARCHAR(255),
+    secao VARCHAR(255),
+    telefone VARCHAR(50),
+    active TINYINT(1) NOT NULL,
+    INDEX idx_secao (secao)
+);
+
+LOAD DATA LOCAL INFILE {sql_path(employees_csv)}
+INTO TABLE stg_employees
+{LOAD_DATA_OPTIONS}
+(employeeCode, name, email, corporateEmail, personalEmail, cargo, secao, telefone, active);
+
+INSERT INTO employees (
+    employeeCode, chapa, name, email, corporateEmail, personalEmail,
+    cargo, secao, telefone, departmentId, active, status, createdAt, updatedAt
+)
+SELECT
+    s.employeeCode, s.employeeCode, s.name, s.email, s.corporateEmail, s.personalEmail,
+    s.cargo, s.secao, s.telefone, d.id, s.active,
+    IF(s.active = 1, 'ativo', 'desligado'), NOW(), NOW()
+FROM stg_employees s
+LEFT JOIN departments d ON d.name = s.secao
+ON DUPLICATE KEY UPDATE
+    name = VALUES(name), email = VALUES(email),
+    corporateEmail = VALUES(corporateEmail), personalEmail = VALUES(personalEmail),
+    cargo = VALUES(cargo), secao = VALUES(secao), telefone = VALUES(telefone),
+    departmentId = VALUES(departmentId), active = VALUES(active), updatedAt = NOW();
+
+DROP TEMPORARY TABLE stg_departments;
+DROP TEMPORARY TABLE stg_employees;
+
+COMMIT;
+"""
+    with open(load_sql, 'w', encoding='utf-8') as f:
+        f.write(script)
+    
+    return load_sql
+
 def main():
+    parser = argparse.ArgumentParser(description="Process sections and employees spreadsheets")
+    parser.add_argument('--format', choices=['json', 'loaddata'], default='json',
+                        help="json: imported_*.json files; loaddata: CSV files + LOAD DATA LOCAL INFILE script")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="Output directory")
+    args = parser.parse_args()
+    
     # Process sections
     print("📊 Processing sections...")
-    sections = process_sections('/home/ubuntu/upload/relaçãodeseções.XLSX')
+    sections = process_sections(SECTIONS_FILE)
     print(f"✅ Found {len(sections)} sections")
     
     # Process employees
     print("👥 Processing employees...")
-    employees = process_employees('/home/ubuntu/upload/relaçãofuncionários.xlsx')
+    employees = process_employees(EMPLOYEES_FILE)
     print(f"✅ Found {len(employees)} employees")
     
-    # Save to JSON files
-    with open('/home/ubuntu/avd-uisa-sistema-completo/scripts/imported_sections.json', 'w', encoding='utf-8') as f:
-        json.dump(sections, f, ensure_ascii=False, indent=2)
-    
-    with open('/home/ubuntu/avd-uisa-sistema-completo/scripts/imported_employees.json', 'w', encoding='utf-8') as f:
-        json.dump(employees, f, ensure_ascii=False, indent=2)
-    
-    print("\n📁 Files saved:")
-    print("  - imported_sections.json")
-    print("  - imported_employees.json")
+    if args.format == 'loaddata':
+        load_sql = write_loaddata_files(sections, employees, args.output_dir)
+        
+        print("\n📁 Files saved:")
+        print("  - departments.csv")
+        print("  - employees.csv")
+        print(f"  - {os.path.basename(load_sql)}")
+    else:
+        # Save to JSON files
+        with open(os.path.join(args.output_dir, 'imported_sections.json'), 'w', encoding='utf-8') as f:
+            json.dump(sections, f, ensure_ascii=False, indent=2)
+        
+        with open(os.path.join(args.output_dir, 'imported_employees.json'), 'w', encoding='utf-8') as f:
+            json.dump(employees, f, ensure_ascii=False, indent=2)
+        
+        print("\n📁 Files saved:")
+        print("  - imported_sections.json")
+        print("  - imported_employees.json")
     
     # Statistics
     print("\n📈 Statistics:")
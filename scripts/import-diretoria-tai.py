@@ -2,106 +2,160 @@
 """
 Script de Importação de Dados da Diretoria TAI
 Processa o arquivo DIRETORIATAI.xlsx e gera SQL para importação
+
+Com --apply, o mesmo upsert é enviado diretamente ao banco (DATABASE_URL),
+em lotes parametrizados, sem gerar o arquivo SQL.
 """
 
 import pandas as pd
+import argparse
 import json
+import sys
 from datetime import datetime
 
-# Ler arquivo Excel
-df = pd.read_excel('/home/ubuntu/upload/DIRETORIATAI.xlsx')
-
-print(f"Total de registros: {len(df)}")
-print(f"\nColunas disponíveis: {list(df.columns)}")
-
-# Análise dos dados
-print("\n=== ANÁLISE DOS DADOS ===")
-print(f"\nTotal de funcionários: {len(df)}")
-print(f"\nStatus dos funcionários:")
-print(df['SITUAÇÃO'].value_counts())
-
-print(f"\nDiretorias:")
-print(df['DIRETORIA'].value_counts())
-
-print(f"\nGerências:")
-print(df['GERENCIA'].value_counts())
-
-print(f"\nCargos:")
-print(df['CARGO'].value_counts())
-
-# Identificar líderes (baseado em palavras-chave no cargo/função)
-lideres_keywords = ['lider', 'líder', 'coordenador', 'supervisor', 'gerente', 'diretor', 'encarregado']
-df['IS_LEADER'] = df['FUNÇÃO'].str.lower().str.contains('|'.join(lideres_keywords), na=False) | \
-                  df['CARGO'].str.lower().str.contains('|'.join(lideres_keywords), na=False)
-
-print(f"\n=== LÍDERES IDENTIFICADOS ===")
-lideres = df[df['IS_LEADER'] == True][['CHAPA', 'NOME', 'CARGO', 'FUNÇÃO', 'GERENCIA']]
-print(f"Total de líderes: {len(lideres)}")
-print(lideres.to_string(index=False))
-
-# Preparar dados para importação
-employees_data = []
-
-for idx, row in df.iterrows():
-    # Determinar papel baseado no cargo
-    role = 'user'
-    if any(keyword in str(row['FUNÇÃO']).lower() for keyword in ['diretor']):
-        role = 'admin'
-    elif any(keyword in str(row['FUNÇÃO']).lower() for keyword in ['gerente', 'coordenador']):
-        role = 'rh'
-    elif row['IS_LEADER']:
-        role = 'lider'
-    
-    # Email corporativo ou pessoal
-    email = row['EMAILCORPORATIVO'] if pd.notna(row['EMAILCORPORATIVO']) and row['EMAILCORPORATIVO'] != 'Endereçoeletrônico@uisa.com.br' else row['EMAILPESSOAL']
-    
-    # Status
-    status = 'active' if row['SITUAÇÃO'] == 'Ativo' else 'inactive'
-    
-    employee = {
-        'employeeId': str(row['CHAPA']),
-        'name': row['NOME'],
-        'email': email if pd.notna(email) else None,
-        'phone': str(row['TELEFONE']) if pd.notna(row['TELEFONE']) else None,
-        'position': row['FUNÇÃO'],
-        'department': row['GERENCIA'],
-        'directorate': row['DIRETORIA'],
-        'jobTitle': row['CARGO'],
-        'status': status,
-        'role': role,
-        'section': row['SEÇÃO'] if pd.notna(row['SEÇÃO']) else None,
-        'sectionCode': row['CODSEÇÃO'] if pd.notna(row['CODSEÇÃO']) else None,
-        'functionCode': str(row['CODFUNÇÃO']) if pd.notna(row['CODFUNÇÃO']) else None,
-    }
-    
-    employees_data.append(employee)
-
-# Salvar JSON para análise
-output_json = '/home/ubuntu/avd-uisa-sistema-completo/scripts/diretoria-tai-data.json'
-with open(output_json, 'w', encoding='utf-8') as f:
-    json.dump(employees_data, f, ensure_ascii=False, indent=2)
-
-print(f"\n=== DADOS PROCESSADOS ===")
-print(f"Arquivo JSON gerado: {output_json}")
-print(f"Total de registros processados: {len(employees_data)}")
-
-# Estatísticas por papel
-roles_count = {}
-for emp in employees_data:
-    role = emp['role']
-    roles_count[role] = roles_count.get(role, 0) + 1
-
-print(f"\n=== DISTRIBUIÇÃO DE PAPÉIS ===")
-for role, count in sorted(roles_count.items()):
-    print(f"{role}: {count}")
-
-# Gerar SQL de importação
-print("\n=== GERANDO SQL DE IMPORTAÇÃO ===")
-
-sql_statements = []
-
-# SQL para inserir funcionários
-for emp in employees_data:
+from excel_cache import read_excel_cached
+from role_classifier import LEADER_KEYWORDS, keyword_flags, select_by_rules
+
+# Configurações
+INPUT_FILE = '/home/ubuntu/upload/DIRETORIATAI.xlsx'
+OUTPUT_JSON = '/home/ubuntu/avd-uisa-sistema-completo/scripts/diretoria-tai-data.json'
+OUTPUT_SQL = '/home/ubuntu/avd-uisa-sistema-completo/scripts/import-diretoria-tai.sql'
+DEFAULT_BATCH_SIZE = 500
+
+# Papel a partir da FUNÇÃO, em ordem de prioridade; demais líderes recebem 'lider'
+ROLE_RULES = (
+    ('admin', ('diretor',)),
+    ('rh', ('gerente', 'coordenador')),
+)
+
+# hierarchyLevel a partir do papel
+HIERARCHY_MAP = {
+    'admin': 'diretoria',
+    'rh': 'gerencia',
+    'lider': 'supervisao',
+    'user': 'operacional'
+}
+
+# Upsert parametrizado usado pelo modo --apply (mesmas colunas do arquivo SQL).
+# Sem "updatedAt = NOW()" no UPDATE: a coluna já é ON UPDATE CURRENT_TIMESTAMP,
+# e linhas sem mudança afetam 0 registros, o que permite contar as inalteradas.
+UPSERT_COLUMNS = (
+    'employeeCode', 'chapa', 'name', 'email', 'telefone', 'funcao', 'gerencia',
+    'diretoria', 'cargo', 'situacao', 'secao', 'codSecao', 'codFuncao',
+    'active', 'hierarchyLevel'
+)
+
+UPSERT_SQL = f"""
+INSERT INTO employees (
+    {', '.join(UPSERT_COLUMNS)}, createdAt, updatedAt
+) VALUES (
+    {', '.join(['%s'] * len(UPSERT_COLUMNS))}, NOW(), NOW()
+)
+ON DUPLICATE KEY UPDATE
+    name = VALUES(name),
+    email = VALUES(email),
+    telefone = VALUES(telefone),
+    funcao = VALUES(funcao),
+    gerencia = VALUES(gerencia),
+    diretoria = VALUES(diretoria),
+    cargo = VALUES(cargo),
+    situacao = VALUES(situacao),
+    secao = VALUES(secao),
+    codSecao = VALUES(codSecao),
+    codFuncao = VALUES(codFuncao),
+    active = VALUES(active),
+    hierarchyLevel = VALUES(hierarchyLevel)
+"""
+
+def classify_roles(df):
+    """
+    Adiciona IS_LEADER (palavra-chave de liderança no cargo ou função) e ROLE
+    ao DataFrame, classificando a planilha inteira de uma vez
+    """
+    funcao_flags = keyword_flags(df['FUNÇÃO'])
+    cargo_flags = keyword_flags(df['CARGO'])
+
+    df['IS_LEADER'] = (funcao_flags | cargo_flags)[list(LEADER_KEYWORDS)].any(axis=1)
+
+    role = select_by_rules(funcao_flags, ROLE_RULES)
+    df['ROLE'] = role.where(role.notna(), df['IS_LEADER'].map({True: 'lider', False: 'user'}))
+    return df
+
+def load_and_analyze(input_file):
+    """Lê a planilha e imprime a análise dos dados e dos líderes"""
+    df = read_excel_cached(input_file)
+
+    print(f"Total de registros: {len(df)}")
+    print(f"\nColunas disponíveis: {list(df.columns)}")
+
+    # Análise dos dados
+    print("\n=== ANÁLISE DOS DADOS ===")
+    print(f"\nTotal de funcionários: {len(df)}")
+    print(f"\nStatus dos funcionários:")
+    print(df['SITUAÇÃO'].value_counts())
+
+    print(f"\nDiretorias:")
+    print(df['DIRETORIA'].value_counts())
+
+    print(f"\nGerências:")
+    print(df['GERENCIA'].value_counts())
+
+    print(f"\nCargos:")
+    print(df['CARGO'].value_counts())
+
+    classify_roles(df)
+
+    print(f"\n=== LÍDERES IDENTIFICADOS ===")
+    lideres = df[df['IS_LEADER'] == True][['CHAPA', 'NOME', 'CARGO', 'FUNÇÃO', 'GERENCIA']]
+    print(f"Total de líderes: {len(lideres)}")
+    print(lideres.to_string(index=False))
+
+    return df
+
+def build_employees_data(df):
+    """Prepara os registros de funcionários para importação"""
+    employees_data = []
+
+    for idx, row in df.iterrows():
+        # Email corporativo ou pessoal
+        email = row['EMAILCORPORATIVO'] if pd.notna(row['EMAILCORPORATIVO']) and row['EMAILCORPORATIVO'] != 'Endereçoeletrônico@uisa.com.br' else row['EMAILPESSOAL']
+
+        # Status
+        status = 'active' if row['SITUAÇÃO'] == 'Ativo' else 'inactive'
+
+        employee = {
+            'employeeId': str(row['CHAPA']),
+            'name': row['NOME'],
+            'email': email if pd.notna(email) else None,
+            'phone': str(row['TELEFONE']) if pd.notna(row['TELEFONE']) else None,
+            'position': row['FUNÇÃO'],
+            'department': row['GERENCIA'],
+            'directorate': row['DIRETORIA'],
+            'jobTitle': row['CARGO'],
+            'status': status,
+            'role': row['ROLE'],
+            'section': row['SEÇÃO'] if pd.notna(row['SEÇÃO']) else None,
+            'sectionCode': row['CODSEÇÃO'] if pd.notna(row['CODSEÇÃO']) else None,
+            'functionCode': str(row['CODFUNÇÃO']) if pd.notna(row['CODFUNÇÃO']) else None,
+        }
+
+        employees_data.append(employee)
+
+    return employees_data
+
+def print_roles_distribution(employees_data):
+    """Imprime a distribuição de papéis"""
+    roles_count = {}
+    for emp in employees_data:
+        role = emp['role']
+        roles_count[role] = roles_count.get(role, 0) + 1
+
+    print(f"\n=== DISTRIBUIÇÃO DE PAPÉIS ===")
+    for role, count in sorted(roles_count.items()):
+        print(f"{role}: {count}")
+
+def build_upsert_sql(emp):
+    """Gera o comando SQL (texto) de upsert de um funcionário"""
     # Escapar aspas simples
     name = emp['name'].replace("'", "''")
     email = emp['email'].replace("'", "''") if emp['email'] else None
@@ -111,21 +165,15 @@ for emp in employees_data:
     directorate = emp['directorate'].replace("'", "''") if emp['directorate'] else None
     job_title = emp['jobTitle'].replace("'", "''") if emp['jobTitle'] else None
     section = emp['section'].replace("'", "''") if emp['section'] else None
-    
+
     # Determinar active baseado no status
     active_value = '1' if emp['status'] == 'active' else '0'
     situacao_value = 'Ativo' if emp['status'] == 'active' else 'Ferias'
-    
+
     # Determinar hierarchyLevel baseado no role
-    hierarchy_map = {
-        'admin': 'diretoria',
-        'rh': 'gerencia',
-        'lider': 'supervisao',
-        'user': 'operacional'
-    }
-    hierarchy = hierarchy_map.get(emp['role'], 'operacional')
-    
-    sql = f"""
+    hierarchy = HIERARCHY_MAP.get(emp['role'], 'operacional')
+
+    return f"""
 INSERT INTO employees (
     employeeCode, chapa, name, email, telefone, funcao, gerencia, 
     diretoria, cargo, situacao, secao, codSecao, codFuncao, 
@@ -165,17 +213,139 @@ ON DUPLICATE KEY UPDATE
     hierarchyLevel = VALUES(hierarchyLevel),
     updatedAt = NOW();
 """
-    sql_statements.append(sql)
-
-# Salvar SQL
-output_sql = '/home/ubuntu/avd-uisa-sistema-completo/scripts/import-diretoria-tai.sql'
-with open(output_sql, 'w', encoding='utf-8') as f:
-    f.write("-- Importação de Dados da Diretoria TAI\n")
-    f.write(f"-- Gerado em: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    f.write(f"-- Total de registros: {len(employees_data)}\n\n")
-    f.write("START TRANSACTION;\n\n")
-    f.write('\n'.join(sql_statements))
-    f.write("\n\nCOMMIT;\n")
-
-print(f"Arquivo SQL gerado: {output_sql}")
-print(f"\n✅ Processamento concluído com sucesso!")
+
+def write_sql_file(employees_data, output_sql):
+    """Gera o arquivo SQL de importação"""
+    print("\n=== GERANDO SQL DE IMPORTAÇÃO ===")
+
+    sql_statements = [build_upsert_sql(emp) for emp in employees_data]
+
+    with open(output_sql, 'w', encoding='utf-8') as f:
+        f.write("-- Importação de Dados da Diretoria TAI\n")
+        f.write(f"-- Gerado em: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"-- Total de registros: {len(employees_data)}\n\n")
+        f.write("START TRANSACTION;\n\n")
+        f.write('\n'.join(sql_statements))
+        f.write("\n\nCOMMIT;\n")
+
+    print(f"Arquivo SQL gerado: {output_sql}")
+
+def to_param(value):
+    """Converte um valor da planilha em parâmetro SQL (texto ou None)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
+
+def upsert_params(emp):
+    """Parâmetros de UPSERT_SQL para um funcionário (mesma regra do arquivo SQL)"""
+    active = emp['status'] == 'active'
+    return (
+        emp['employeeId'],
+        emp['employeeId'],
+        to_param(emp['name']),
+        to_param(emp['email']) or None,
+        to_param(emp['phone']) or None,
+        to_param(emp['position']) or None,
+        to_param(emp['department']) or None,
+        to_param(emp['directorate']) or None,
+        to_param(emp['jobTitle']) or None,
+        'Ativo' if active else 'Ferias',
+        to_param(emp['section']) or None,
+        to_param(emp['sectionCode']) or None,
+        to_param(emp['functionCode']) or None,
+        1 if active else 0,
+        HIERARCHY_MAP.get(emp['role'], 'operacional'),
+    )
+
+def apply_to_database(employees_data, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Aplica o upsert diretamente no banco, em lotes parametrizados com commit
+    por lote. Retorna {'inserted', 'updated', 'unchanged'}.
+
+    Para cada lote, as chapas já existentes são consultadas antes do upsert;
+    o rowcount do ON DUPLICATE KEY UPDATE (1 por inserção, 2 por atualização,
+    0 sem mudança) separa as linhas atualizadas das inalteradas. Chapas
+    repetidas no lote contam uma inserção e, nas demais ocorrências, uma
+    atualização ou linha inalterada.
+    """
+    from avd_db import get_connection
+
+    print("\n=== APLICANDO NO BANCO DE DADOS ===")
+
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    params = [upsert_params(emp) for emp in employees_data]
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(params), batch_size):
+            batch = params[start:start + batch_size]
+            codes = sorted({row[0] for row in batch})
+            placeholders = ', '.join(['%s'] * len(codes))
+            cursor.execute(
+                f"SELECT employeeCode FROM employees WHERE employeeCode IN ({placeholders})",
+                tuple(codes)
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+
+            cursor.executemany(UPSERT_SQL, batch)
+            affected = cursor.rowcount
+            conn.commit()
+
+            # Uma inserção por chapa nova; as demais linhas do lote encontram um registro
+            inserted = len(set(codes) - existing)
+            updated = max(0, (affected - inserted) // 2)
+            totals['inserted'] += inserted
+            totals['updated'] += updated
+            totals['unchanged'] += max(0, len(batch) - inserted - updated)
+
+            print(f"  Lote {start // batch_size + 1}: {len(batch)} registros "
+                  f"({inserted} inseridos, {updated} atualizados)")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"\nInseridos: {totals['inserted']}")
+    print(f"Atualizados: {totals['updated']}")
+    print(f"Inalterados: {totals['unchanged']}")
+
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação de dados da Diretoria TAI")
+    parser.add_argument('input_file', nargs='?', default=INPUT_FILE, help="Planilha DIRETORIATAI.xlsx")
+    parser.add_argument('--apply', action='store_true',
+                        help="Envia o upsert diretamente ao banco (DATABASE_URL) em vez de gerar o arquivo SQL")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Registros por lote/commit no modo --apply (padrão: {DEFAULT_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    df = load_and_analyze(args.input_file)
+    employees_data = build_employees_data(df)
+
+    # Salvar JSON para análise
+    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
+        json.dump(employees_data, f, ensure_ascii=False, indent=2)
+
+    print(f"\n=== DADOS PROCESSADOS ===")
+    print(f"Arquivo JSON gerado: {OUTPUT_JSON}")
+    print(f"Total de registros processados: {len(employees_data)}")
+
+    print_roles_distribution(employees_data)
+
+    if args.apply:
+        try:
+            apply_to_database(employees_data, batch_size=args.batch_size)
+        except Exception as e:
+            print(f"\n✗ Erro ao aplicar no banco de dados: {e}")
+            sys.exit(1)
+    else:
+        write_sql_file(employees_data, OUTPUT_SQL)
+
+    print(f"\n✅ Processamento concluído com sucesso!")
+
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,16 @@ e gera arquivos SQL para importação no banco de dados.
 """
 
 import pandas as pd
+import argparse
 import json
 import re
 from datetime import datetime
 
+from excel_cache import read_excel_cached
+from role_classifier import classify_functions
+
 # Configurações
+DEFAULT_MAX_STATEMENT_KB = 1024  # Tamanho máximo de cada INSERT multi-linha (abaixo do max_allowed_packet)
 INPUT_FILE = '/home/ubuntu/upload/funcionarioscomahierarquia.xlsx'
 OUTPUT_DIR = '/home/ubuntu/avd-uisa-sistema-completo/scripts'
 
@@ -37,6 +42,101 @@ def clean_code(value):
     value = value.lstrip('0') or '0'
     return value
 
+def clean_string_series(series):
+    """Versão vetorizada de clean_string para uma coluna inteira"""
+    cleaned = series.astype('string').str.strip()
+    cleaned = cleaned.mask((cleaned == '') | (cleaned.str.lower() == 'nan'))
+    return cleaned.astype(object).where(cleaned.notna(), None)
+
+def clean_code_series(series):
+    """Versão vetorizada de clean_code para uma coluna inteira"""
+    cleaned = series.astype('string').str.strip()
+    cleaned = cleaned.str.replace(r'\.0$', '', regex=True).str.lstrip('0')
+    cleaned = cleaned.mask(cleaned == '', '0')
+    return cleaned.astype(object).where(series.notna(), None)
+
+# Grupos de colunas (chapa, nome, email, função) de cada nível de liderança
+LEADER_COLUMN_GROUPS = {
+    'presidente': ('chapa_presidente', 'presidente', 'email_presidente', 'funcao_presidente'),
+    'diretor': ('chapa_diretor', 'diretor', 'email_diretor', 'funcao_diretor'),
+    'gestor': ('chapa_gestor', 'gestor', 'email_gestor', 'funcao_gestor'),
+    'coordenador': ('chapa_coordenador', 'coordenador', 'email_coordenador', 'funcao_coordenador'),
+}
+
+def extract_leaders(df):
+    """
+    Empilha os quatro grupos de colunas de liderança em um único DataFrame
+    (chapa, nome, email, funcao, nivel), limpa as colunas inteiras e remove
+    duplicatas.
+    """
+    groups = []
+    for level, (chapa_col, name_col, email_col, function_col) in LEADER_COLUMN_GROUPS.items():
+        present = df[chapa_col].notna() & df[name_col].notna()
+        group = df.loc[present, [chapa_col, name_col, email_col, function_col]]
+        group.columns = ['chapa', 'nome', 'email', 'funcao']
+        groups.append(group.assign(nivel=level))
+    
+    stacked = pd.concat(groups, ignore_index=True)
+    leaders = pd.DataFrame({
+        'chapa': clean_code_series(stacked['chapa']),
+        'nome': clean_string_series(stacked['nome']),
+        'email': clean_string_series(stacked['email']),
+        'funcao': clean_string_series(stacked['funcao']),
+        'nivel': stacked['nivel'],
+    })
+    
+    return leaders.drop_duplicates(ignore_index=True)
+
+def compute_manager_map(funcionarios_df):
+    """
+    Calcula, para cada funcionário, a chapa do gestor direto
+    (prioridade: coordenador > gestor > diretor, ignorando a própria chapa).
+    
+    Retorna um DataFrame (chapa, gestor_chapa) apenas com funcionários que têm gestor.
+    """
+    chapa = clean_code_series(funcionarios_df['chapa'])
+    gestor_chapa = pd.Series([None] * len(chapa), index=chapa.index, dtype=object)
+    
+    # Da menor para a maior prioridade: cada nível sobrescreve o anterior quando válido
+    for column in ('chapa_diretor', 'chapa_gestor', 'chapa_coordenador'):
+        candidate = clean_code_series(funcionarios_df[column])
+        valid = candidate.notna() & (candidate != chapa)
+        gestor_chapa = candidate.where(valid, gestor_chapa)
+    
+    mapping = pd.DataFrame({'chapa': chapa, 'gestor_chapa': gestor_chapa})
+    mapping = mapping[mapping['chapa'].notna() & mapping['gestor_chapa'].notna()]
+    
+    return mapping.drop_duplicates(subset=['chapa'], keep='last')
+
+def build_multirow_inserts(header, value_rows, footer='', max_statement_bytes=DEFAULT_MAX_STATEMENT_KB * 1024):
+    """
+    Agrupa tuplas SQL já formatadas ("(...)") em comandos
+    `header VALUES (...),(...) footer;` de no máximo `max_statement_bytes` bytes.
+    """
+    statements = []
+    fixed_bytes = len(f"{header}\n{footer};".encode('utf-8'))
+    batch = []
+    batch_bytes = fixed_bytes
+    
+    def flush():
+        suffix = f" {footer}" if footer else ''
+        statements.append(f"{header}\n" + ",\n".join(batch) + f"{suffix};")
+    
+    for values in value_rows:
+        # +2 para ",\n" entre as tuplas
+        values_bytes = len(values.encode('utf-8')) + 2
+        if batch and batch_bytes + values_bytes > max_statement_bytes:
+            flush()
+            batch = []
+            batch_bytes = fixed_bytes
+        batch.append(values)
+        batch_bytes += values_bytes
+    
+    if batch:
+        flush()
+    
+    return statements
+
 def escape_sql(value):
     """Escapa strings para SQL"""
     if value is None:
@@ -44,12 +144,12 @@ def escape_sql(value):
     value = str(value).replace("'", "''").replace("\\", "\\\\")
     return f"'{value}'"
 
-def main():
+def main(max_statement_bytes=DEFAULT_MAX_STATEMENT_KB * 1024, use_transaction=False, disable_checks=False):
     print("=== Iniciando Importação de Funcionários ===")
     print(f"Arquivo: {INPUT_FILE}")
     
     # Ler arquivo Excel
-    df = pd.read_excel(INPUT_FILE)
+    df = read_excel_cached(INPUT_FILE)
     print(f"Total de registros: {len(df)}")
     
     # Renomear colunas para facilitar acesso
@@ -94,51 +194,8 @@ def main():
     # =========================================================================
     # 5. EXTRAIR HIERARQUIA (líderes únicos)
     # =========================================================================
-    lideres = set()
-    
-    # Presidentes
-    for _, row in df.iterrows():
-        if pd.notna(row['chapa_presidente']) and pd.notna(row['presidente']):
-            lideres.add((
-                clean_code(row['chapa_presidente']),
-                clean_string(row['presidente']),
-                clean_string(row['email_presidente']),
-                clean_string(row['funcao_presidente']),
-                'presidente'
-            ))
-    
-    # Diretores
-    for _, row in df.iterrows():
-        if pd.notna(row['chapa_diretor']) and pd.notna(row['diretor']):
-            lideres.add((
-                clean_code(row['chapa_diretor']),
-                clean_string(row['diretor']),
-                clean_string(row['email_diretor']),
-                clean_string(row['funcao_diretor']),
-                'diretor'
-            ))
-    
-    # Gestores
-    for _, row in df.iterrows():
-        if pd.notna(row['chapa_gestor']) and pd.notna(row['gestor']):
-            lideres.add((
-                clean_code(row['chapa_gestor']),
-                clean_string(row['gestor']),
-                clean_string(row['email_gestor']),
-                clean_string(row['funcao_gestor']),
-                'gestor'
-            ))
-    
-    # Coordenadores
-    for _, row in df.iterrows():
-        if pd.notna(row['chapa_coordenador']) and pd.notna(row['coordenador']):
-            lideres.add((
-                clean_code(row['chapa_coordenador']),
-                clean_string(row['coordenador']),
-                clean_string(row['email_coordenador']),
-                clean_string(row['funcao_coordenador']),
-                'coordenador'
-            ))
+    lideres = extract_leaders(df)
+    lideres_por_nivel = lideres.groupby('nivel').size()
     
     print(f"Líderes únicos identificados: {len(lideres)}")
     
@@ -156,6 +213,14 @@ def main():
     sql_statements.append("-- ============================================")
     sql_statements.append("")
     
+    if disable_checks:
+        sql_statements.append("SET @OLD_UNIQUE_CHECKS = @@UNIQUE_CHECKS, UNIQUE_CHECKS = 0;")
+        sql_statements.append("SET @OLD_FOREIGN_KEY_CHECKS = @@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS = 0;")
+    if use_transaction:
+        sql_statements.append("START TRANSACTION;")
+    if disable_checks or use_transaction:
+        sql_statements.append("")
+    
     # 6.1 Inserir Departamentos/Seções
     sql_statements.append("-- ============================================")
     sql_statements.append("-- DEPARTAMENTOS/SEÇÕES")
@@ -163,6 +228,7 @@ def main():
     sql_statements.append("")
     
     dept_map = {}
+    dept_rows = []
     for idx, (_, row) in enumerate(secoes_df.iterrows(), 1):
         cod = clean_string(row['cod_secao']) or f'SEC{idx:04d}'
         nome = clean_string(row['secao'])
@@ -170,11 +236,12 @@ def main():
             # Criar código único baseado no nome se não tiver código
             code = re.sub(r'[^a-zA-Z0-9]', '', cod)[:50] if cod else f'SEC{idx:04d}'
             dept_map[nome] = code
-            sql_statements.append(
-                f"INSERT IGNORE INTO departments (code, name, active, createdAt, updatedAt) "
-                f"VALUES ({escape_sql(code)}, {escape_sql(nome)}, 1, NOW(), NOW());"
-            )
+            dept_rows.append(f"({escape_sql(code)}, {escape_sql(nome)}, 1, NOW(), NOW())")
     
+    sql_statements.extend(build_multirow_inserts(
+        "INSERT IGNORE INTO departments (code, name, active, createdAt, updatedAt) VALUES",
+        dept_rows, max_statement_bytes=max_statement_bytes
+    ))
     sql_statements.append("")
     
     # 6.2 Inserir Cargos/Funções
@@ -183,7 +250,11 @@ def main():
     sql_statements.append("-- ============================================")
     sql_statements.append("")
     
+    # Determinar nível hierárquico de todos os cargos de uma vez
+    funcoes_df = funcoes_df.assign(level=classify_functions(funcoes_df['funcao'])['position_level'])
+    
     position_map = {}
+    position_rows = []
     for idx, (_, row) in enumerate(funcoes_df.iterrows(), 1):
         cod = clean_string(row['cod_funcao']) or f'FUN{idx:04d}'
         titulo = clean_string(row['funcao'])
@@ -191,29 +262,12 @@ def main():
             code = str(cod)[:50] if cod else f'FUN{idx:04d}'
             position_map[titulo] = code
             
-            # Determinar nível hierárquico
-            titulo_lower = titulo.lower()
-            level = 'NULL'
-            if 'diretor' in titulo_lower or 'presidente' in titulo_lower:
-                level = "'diretor'"
-            elif 'gerente' in titulo_lower:
-                level = "'gerente'"
-            elif 'coordenador' in titulo_lower:
-                level = "'coordenador'"
-            elif 'supervisor' in titulo_lower or 'líder' in titulo_lower or 'lider' in titulo_lower:
-                level = "'especialista'"
-            elif 'senior' in titulo_lower or 'sênior' in titulo_lower:
-                level = "'senior'"
-            elif 'pleno' in titulo_lower:
-                level = "'pleno'"
-            elif 'junior' in titulo_lower or 'júnior' in titulo_lower:
-                level = "'junior'"
-            
-            sql_statements.append(
-                f"INSERT IGNORE INTO positions (code, title, level, active, createdAt, updatedAt) "
-                f"VALUES ({escape_sql(code)}, {escape_sql(titulo)}, {level}, 1, NOW(), NOW());"
-            )
+            position_rows.append(f"({escape_sql(code)}, {escape_sql(titulo)}, {escape_sql(row['level'])}, 1, NOW(), NOW())")
     
+    sql_statements.extend(build_multirow_inserts(
+        "INSERT IGNORE INTO positions (code, title, level, active, createdAt, updatedAt) VALUES",
+        position_rows, max_statement_bytes=max_statement_bytes
+    ))
     sql_statements.append("")
     
     # 6.3 Inserir Funcionários
@@ -222,7 +276,13 @@ def main():
     sql_statements.append("-- ============================================")
     sql_statements.append("")
     
+    # Determinar nível hierárquico dos funcionários de uma vez
+    funcionarios_df = funcionarios_df.assign(
+        hierarchy_level=classify_functions(funcionarios_df['funcao'])['hierarchy_level']
+    )
+
     employee_chapas = set()
+    employee_rows = []
     
     for _, row in funcionarios_df.iterrows():
         chapa = clean_code(row['chapa'])
@@ -243,38 +303,31 @@ def main():
         chapa_coordenador = clean_code(row['chapa_coordenador'])
         chapa_diretor = clean_code(row['chapa_diretor'])
         
-        # Determinar nível hierárquico do funcionário
-        hierarchy_level = 'operacional'
-        if funcao:
-            funcao_lower = funcao.lower()
-            if 'presidente' in funcao_lower or 'diretor' in funcao_lower:
-                hierarchy_level = 'diretoria'
-            elif 'gerente' in funcao_lower:
-                hierarchy_level = 'gerencia'
-            elif 'coordenador' in funcao_lower:
-                hierarchy_level = 'coordenacao'
-            elif 'supervisor' in funcao_lower or 'líder' in funcao_lower or 'lider' in funcao_lower:
-                hierarchy_level = 'supervisao'
+        hierarchy_level = row['hierarchy_level']
         
         # Determinar gestor direto (coordenador > gestor > diretor)
         gestor_chapa = chapa_coordenador or chapa_gestor or chapa_diretor
         
-        sql_statements.append(
-            f"INSERT INTO employees ("
-            f"employeeCode, name, email, corporateEmail, chapa, "
-            f"codSecao, secao, codFuncao, funcao, "
-            f"hierarchyLevel, status, active, createdAt, updatedAt"
-            f") VALUES ("
-            f"{escape_sql(chapa)}, {escape_sql(nome)}, {escape_sql(email)}, {escape_sql(email)}, {escape_sql(chapa)}, "
+        employee_rows.append(
+            f"({escape_sql(chapa)}, {escape_sql(nome)}, {escape_sql(email)}, {escape_sql(email)}, {escape_sql(chapa)}, "
             f"{escape_sql(cod_secao)}, {escape_sql(secao)}, {escape_sql(cod_funcao)}, {escape_sql(funcao)}, "
-            f"'{hierarchy_level}', 'ativo', 1, NOW(), NOW()"
-            f") ON DUPLICATE KEY UPDATE "
-            f"name = VALUES(name), email = VALUES(email), corporateEmail = VALUES(corporateEmail), "
-            f"codSecao = VALUES(codSecao), secao = VALUES(secao), "
-            f"codFuncao = VALUES(codFuncao), funcao = VALUES(funcao), "
-            f"hierarchyLevel = VALUES(hierarchyLevel), updatedAt = NOW();"
+            f"'{hierarchy_level}', 'ativo', 1, NOW(), NOW())"
         )
     
+    sql_statements.extend(build_multirow_inserts(
+        "INSERT INTO employees ("
+        "employeeCode, name, email, corporateEmail, chapa, "
+        "codSecao, secao, codFuncao, funcao, "
+        "hierarchyLevel, status, active, createdAt, updatedAt"
+        ") VALUES",
+        employee_rows,
+        "ON DUPLICATE KEY UPDATE "
+        "name = VALUES(name), email = VALUES(email), corporateEmail = VALUES(corporateEmail), "
+        "codSecao = VALUES(codSecao), secao = VALUES(secao), "
+        "codFuncao = VALUES(codFuncao), funcao = VALUES(funcao), "
+        "hierarchyLevel = VALUES(hierarchyLevel), updatedAt = NOW()",
+        max_statement_bytes=max_statement_bytes
+    ))
     sql_statements.append("")
     
     # 6.4 Atualizar relacionamentos hierárquicos
@@ -283,31 +336,36 @@ def main():
     sql_statements.append("-- ============================================")
     sql_statements.append("")
     
-    for _, row in funcionarios_df.iterrows():
-        chapa = clean_code(row['chapa'])
-        if not chapa:
-            continue
-        
-        # Determinar gestor direto
-        chapa_coordenador = clean_code(row['chapa_coordenador'])
-        chapa_gestor = clean_code(row['chapa_gestor'])
-        chapa_diretor = clean_code(row['chapa_diretor'])
-        
-        # Prioridade: coordenador > gestor > diretor
-        gestor_chapa = None
-        if chapa_coordenador and chapa_coordenador != chapa:
-            gestor_chapa = chapa_coordenador
-        elif chapa_gestor and chapa_gestor != chapa:
-            gestor_chapa = chapa_gestor
-        elif chapa_diretor and chapa_diretor != chapa:
-            gestor_chapa = chapa_diretor
-        
-        if gestor_chapa:
-            sql_statements.append(
-                f"UPDATE employees e "
-                f"SET e.managerId = (SELECT id FROM (SELECT id FROM employees WHERE employeeCode = {escape_sql(gestor_chapa)} LIMIT 1) AS tmp) "
-                f"WHERE e.employeeCode = {escape_sql(chapa)};"
-            )
+    # Mapeamento funcionário -> gestor calculado em memória e carregado em lote
+    manager_map = compute_manager_map(funcionarios_df)
+    
+    sql_statements.append("DROP TEMPORARY TABLE IF EXISTS tmp_manager_map;")
+    sql_statements.append(
+        "CREATE TEMPORARY TABLE tmp_manager_map ("
+        "employeeCode VARCHAR(50) NOT NULL PRIMARY KEY, "
+        "managerCode VARCHAR(50) NOT NULL"
+        ");"
+    )
+    
+    sql_statements.extend(build_multirow_inserts(
+        "INSERT INTO tmp_manager_map (employeeCode, managerCode) VALUES",
+        [
+            f"({escape_sql(chapa)}, {escape_sql(gestor_chapa)})"
+            for chapa, gestor_chapa in manager_map.itertuples(index=False, name=None)
+        ],
+        max_statement_bytes=max_statement_bytes
+    ))
+    
+    # Um único UPDATE aplica todos os gestores (NULL se o gestor não existir em employees)
+    sql_statements.append(
+        "UPDATE employees e "
+        "JOIN tmp_manager_map t ON t.employeeCode = e.employeeCode "
+        "LEFT JOIN employees m ON m.employeeCode = t.managerCode "
+        "SET e.managerId = m.id;"
+    )
+    sql_statements.append("DROP TEMPORARY TABLE tmp_manager_map;")
+    
+    print(f"Relações funcionário -> gestor: {len(manager_map)}")
     
     sql_statements.append("")
     
@@ -334,6 +392,15 @@ def main():
     )
     
     sql_statements.append("")
+    
+    if use_transaction:
+        sql_statements.append("COMMIT;")
+    if disable_checks:
+        sql_statements.append("SET UNIQUE_CHECKS = @OLD_UNIQUE_CHECKS;")
+        sql_statements.append("SET FOREIGN_KEY_CHECKS = @OLD_FOREIGN_KEY_CHECKS;")
+    if disable_checks or use_transaction:
+        sql_statements.append("")
+    
     sql_statements.append("-- ============================================")
     sql_statements.append("-- FIM DA IMPORTAÇÃO")
     sql_statements.append("-- ============================================")
@@ -363,10 +430,10 @@ def main():
         },
         'empresas': list(empresas),
         'hierarquia': {
-            'presidentes': len([l for l in lideres if l[4] == 'presidente']),
-            'diretores': len([l for l in lideres if l[4] == 'diretor']),
-            'gestores': len([l for l in lideres if l[4] == 'gestor']),
-            'coordenadores': len([l for l in lideres if l[4] == 'coordenador'])
+            'presidentes': int(lideres_por_nivel.get('presidente', 0)),
+            'diretores': int(lideres_por_nivel.get('diretor', 0)),
+            'gestores': int(lideres_por_nivel.get('gestor', 0)),
+            'coordenadores': int(lideres_por_nivel.get('coordenador', 0))
         }
     }
     
@@ -380,4 +447,19 @@ def main():
     print(f"Execute o arquivo SQL no banco de dados para completar a importação.")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Gera o SQL de importação de funcionários e hierarquias")
+    parser.add_argument('--max-statement-kb', type=int, default=DEFAULT_MAX_STATEMENT_KB,
+                        help=f"Tamanho máximo de cada INSERT multi-linha em KB (padrão: {DEFAULT_MAX_STATEMENT_KB}); "
+                             f"deve ficar abaixo do max_allowed_packet do servidor")
+    parser.add_argument('--transaction', action='store_true',
+                        help="Envolve todo o arquivo em START TRANSACTION / COMMIT")
+    parser.add_argument('--disable-checks', action='store_true',
+                        help="Desliga unique_checks e foreign_key_checks durante a carga "
+                             "(use apenas com dados sem chaves duplicadas)")
+    args = parser.parse_args()
+    
+    main(
+        max_statement_bytes=args.max_statement_kb * 1024,
+        use_transaction=args.transaction,
+        disable_checks=args.disable_checks
+    )
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Indicadores de equipes por gestor
+Sistema AVD UISA
+
+Uma única consulta agregada sobre employees (funcionário ativo -> gestor ativo)
+devolve, por gestor, o tamanho da equipe, o vínculo com users e o nível
+hierárquico. Todos os totais (funcionários com gestor, gestores únicos,
+gestores com usuário, ranking de equipes) são derivados desse resultado.
+
+Uso:
+    from org_analytics import get_manager_teams, summarize_teams
+
+    teams = get_manager_teams(conn)
+    resumo = summarize_teams(teams)
+"""
+
+import argparse
+import json
+import sys
+
+MANAGER_TEAMS_SQL = """
+    SELECT
+        m.id AS manager_id,
+        m.name AS manager_name,
+        m.hierarchyLevel AS manager_level,
+        m.userId AS manager_user_id,
+        COUNT(*) AS team_size
+    FROM employees e
+    INNER JOIN employees m ON e.managerId = m.id
+    WHERE e.active = 1
+    AND m.active = 1
+    GROUP BY m.id, m.name, m.hierarchyLevel, m.userId
+"""
+
+
+def get_manager_teams(conn):
+    """
+    Lista de gestores ativos com equipe ativa, ordenada por tamanho de equipe
+    (decrescente) e nome. Cada item: manager_id, manager_name, manager_level,
+    manager_user_id, team_size.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(MANAGER_TEAMS_SQL)
+        teams = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    for team in teams:
+        team['team_size'] = int(team['team_size'])
+    teams.sort(key=lambda team: (-team['team_size'], team['manager_name'] or ''))
+    return teams
+
+
+def summarize_teams(teams, top=20):
+    """Totais derivados de get_manager_teams"""
+    by_level = {}
+    for team in teams:
+        level = team['manager_level'] or 'sem_nivel'
+        level_stats = by_level.setdefault(level, {'managers': 0, 'employees': 0})
+        level_stats['managers'] += 1
+        level_stats['employees'] += team['team_size']
+
+    return {
+        'employees_with_manager': sum(team['team_size'] for team in teams),
+        'managers': len(teams),
+        'managers_with_user': sum(1 for team in teams if team['manager_user_id']),
+        'by_level': by_level,
+        'top_teams': teams[:top],
+    }
+
+
+def print_team_summary(summary):
+    """Imprime o resumo no formato dos scripts de setup"""
+    print(f"\nTotal de funcionários com gestor: {summary['employees_with_manager']}")
+    print(f"Total de gestores únicos: {summary['managers']}")
+    print(f"Gestores com usuário no sistema: {summary['managers_with_user']}")
+
+    print(f"\n--- Top {len(summary['top_teams'])} Gestores por Tamanho de Equipe ---")
+    for i, eq in enumerate(summary['top_teams'], 1):
+        status_user = "✓" if eq['manager_user_id'] else "✗"
+        print(f"  {i}. {eq['manager_name']} ({eq['manager_level']}): {eq['team_size']} subordinados [{status_user}]")
+
+
+if __name__ == '__main__':
+    from avd_db import get_connection
+
+    parser = argparse.ArgumentParser(description="Indicadores de equipes por gestor")
+    parser.add_argument('--top', type=int, default=20, help="Quantidade de gestores no ranking (padrão: 20)")
+    parser.add_argument('--json', action='store_true', help="Imprime o resumo em JSON")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        summary = summarize_teams(get_manager_teams(conn), top=args.top)
+    finally:
+        conn.close()
+
+    if args.json:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2, default=str)
+        print()
+    else:
+        print_team_summary(summary)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Tabela de fechamento (closure table) da estrutura organizacional
+Sistema AVD UISA
+
+Lê employees(id, managerId) uma única vez, calcula todos os pares
+ancestral/descendente com a distância entre eles e recarrega a tabela
+employeeClosure. Com ela, qualquer pergunta de hierarquia, em qualquer
+profundidade, vira uma consulta indexada simples:
+
+    -- todos os subordinados (diretos e indiretos) de um líder
+    SELECT descendantId FROM employeeClosure WHERE ancestorId = ? AND depth > 0
+
+    -- cadeia de liderança de um funcionário até o topo
+    SELECT ancestorId, depth FROM employeeClosure WHERE descendantId = ? ORDER BY depth
+
+Cada funcionário tem também a linha (id, id, 0).
+
+O cálculo percorre a árvore a partir das raízes (sem gestor, ou com gestor
+inexistente); o custo é proporcional ao tamanho da própria tabela. Ciclos de
+managerId são quebrados no menor id do ciclo, que passa a ser tratado como
+raiz, e reportados.
+
+A carga é feita em uma tabela auxiliar trocada com RENAME TABLE ao final:
+consultas concorrentes nunca veem a tabela pela metade.
+
+Uso:
+    python scripts/org_closure.py                 # recalcula e recarrega
+    python scripts/org_closure.py --dry-run       # só calcula e mostra estatísticas
+"""
+
+import argparse
+import sys
+from collections import defaultdict, deque
+
+from avd_db import get_connection
+
+DEFAULT_BATCH_SIZE = 5000
+
+CLOSURE_TABLE = 'employeeClosure'
+STAGING_TABLE = 'employeeClosure_new'
+OLD_TABLE = 'employeeClosure_old'
+
+CREATE_CLOSURE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    ancestorId INT NOT NULL,
+    descendantId INT NOT NULL,
+    depth INT NOT NULL,
+    createdAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    -- Índices
+    UNIQUE KEY uq_ancestor_descendant (ancestorId, descendantId),
+    INDEX idx_ancestor_depth (ancestorId, depth),
+    INDEX idx_descendant_depth (descendantId, depth)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+INSERT_CLOSURE_SQL = "INSERT INTO {table} (ancestorId, descendantId, depth) VALUES (%s, %s, %s)"
+
+
+def load_manager_edges(cursor):
+    """Lê (id, managerId) de todos os funcionários"""
+    cursor.execute("SELECT id, managerId FROM employees")
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def compute_closure(edges):
+    """
+    Calcula o fechamento a partir de pares (id, managerId).
+
+    Retorna (rows, forced_roots): rows são tuplas (ancestorId, descendantId, depth),
+    incluindo (id, id, 0); forced_roots são os ids escolhidos para quebrar ciclos.
+    """
+    manager_of = {}
+    for employee_id, manager_id in edges:
+        manager_of[employee_id] = manager_id
+
+    children = defaultdict(list)
+    roots = []
+    for employee_id, manager_id in manager_of.items():
+        if manager_id is None or manager_id == employee_id or manager_id not in manager_of:
+            roots.append(employee_id)
+        else:
+            children[manager_id].append(employee_id)
+
+    rows = []
+    # Caminho da raiz até cada nó visitado (ancestrais, do topo para baixo)
+    paths = {}
+
+    def walk(root):
+        paths[root] = (root,)
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            path = paths[node]
+            length = len(path)
+            for position, ancestor in enumerate(path):
+                rows.append((ancestor, node, length - 1 - position))
+            for child in children.get(node, ()):
+                if child not in paths:
+                    paths[child] = path + (child,)
+                    queue.append(child)
+
+    for root in sorted(roots):
+        walk(root)
+
+    # Nós não alcançados estão em um ciclo (ou abaixo de um)
+    forced_roots = []
+    if len(paths) < len(manager_of):
+        for employee_id in sorted(manager_of):
+            if employee_id in paths:
+                continue
+            # Sobe até entrar no ciclo e quebra no menor id dele
+            seen = []
+            node = employee_id
+            while node not in seen and node not in paths:
+                seen.append(node)
+                node = manager_of[node]
+            if node in paths:
+                continue
+            cycle = seen[seen.index(node):]
+            forced_root = min(cycle)
+            forced_roots.append(forced_root)
+            walk(forced_root)
+
+    # Libera a memória dos caminhos antes de devolver as linhas
+    paths.clear()
+    return rows, forced_roots
+
+
+def closure_stats(rows):
+    """Estatísticas resumidas do fechamento"""
+    employees = sum(1 for _, _, depth in rows if depth == 0)
+    max_depth = max((depth for _, _, depth in rows), default=0)
+    return {
+        'employees': employees,
+        'pairs': len(rows),
+        'max_depth': max_depth,
+    }
+
+
+def create_closure_table(cursor, table=CLOSURE_TABLE):
+    """Cria a tabela de fechamento se não existir"""
+    cursor.execute(CREATE_CLOSURE_TABLE_SQL.format(table=table))
+
+
+def rebuild_closure_table(connection, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Carrega `rows` em uma tabela auxiliar e a troca atomicamente com employeeClosure
+    """
+    cursor = connection.cursor()
+    try:
+        create_closure_table(cursor)
+        cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {OLD_TABLE}")
+        cursor.execute(f"CREATE TABLE {STAGING_TABLE} LIKE {CLOSURE_TABLE}")
+
+        insert_sql = INSERT_CLOSURE_SQL.format(table=STAGING_TABLE)
+        for start in range(0, len(rows), batch_size):
+            # executemany gera um único INSERT multi-linha por lote
+            cursor.executemany(insert_sql, rows[start:start + batch_size])
+            connection.commit()
+
+        cursor.execute(
+            f"RENAME TABLE {CLOSURE_TABLE} TO {OLD_TABLE}, {STAGING_TABLE} TO {CLOSURE_TABLE}"
+        )
+        cursor.execute(f"DROP TABLE {OLD_TABLE}")
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def get_subtree_ids(cursor, employee_id, max_depth=None, include_self=False):
+    """Ids dos subordinados diretos e indiretos de `employee_id`"""
+    sql = f"SELECT descendantId FROM {CLOSURE_TABLE} WHERE ancestorId = %s AND depth >= %s"
+    params = [employee_id, 0 if include_self else 1]
+    if max_depth is not None:
+        sql += " AND depth <= %s"
+        params.append(max_depth)
+    cursor.execute(sql, tuple(params))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def get_ancestor_chain(cursor, employee_id):
+    """Cadeia de liderança de `employee_id`, do gestor direto até o topo"""
+    cursor.execute(
+        f"SELECT ancestorId FROM {CLOSURE_TABLE} WHERE descendantId = %s AND depth > 0 ORDER BY depth",
+        (employee_id,)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula a tabela employeeClosure a partir de employees.managerId")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Linhas por INSERT (padrão: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--dry-run', action='store_true', help="Só calcula e mostra estatísticas")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("TABELA DE FECHAMENTO DA HIERARQUIA")
+    print("=" * 60)
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        edges = load_manager_edges(cursor)
+        cursor.close()
+        print(f"✓ {len(edges)} funcionários lidos")
+
+        rows, forced_roots = compute_closure(edges)
+        stats = closure_stats(rows)
+        print(f"✓ {stats['pairs']} pares ancestral/descendente (profundidade máxima: {stats['max_depth']})")
+
+        if forced_roots:
+            print(f"⚠ {len(forced_roots)} ciclo(s) de managerId quebrado(s) nos ids: {forced_roots}")
+
+        if args.dry_run:
+            print("\nDry-run: tabela não alterada")
+            return
+
+        rebuild_closure_table(conn, rows, batch_size=args.batch_size)
+        print(f"✓ Tabela {CLOSURE_TABLE} recarregada")
+    except Exception as e:
+        print(f"\n✗ Erro ao recalcular a tabela de fechamento: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
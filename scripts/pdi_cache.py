@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Cache dos PDIs em HTML já extraídos
+Sistema AVD UISA
+
+Guarda o resultado estruturado de parse_pdi_html (JSON) identificado pelo
+SHA-256 do arquivo HTML e pela versão do extrator: reprocessar um ciclo de
+PDIs custa apenas os planos que mudaram desde a última importação. Alterar a
+extração exige incrementar PARSER_VERSION em parse_pdi_html.py, o que
+invalida as entradas antigas.
+
+O tamanho do cache é limitado: entradas sem uso há mais de
+PDI_CACHE_MAX_AGE_DAYS são removidas e, acima de PDI_CACHE_MAX_MB, as menos
+recentemente usadas (mtime atualizado a cada leitura) saem primeiro.
+
+Variáveis de ambiente:
+    PDI_CACHE=0                desativa o cache
+    PDI_CACHE_DIR              diretório das entradas (padrão: ~/.cache/avd-uisa/pdi)
+    PDI_CACHE_MAX_MB           tamanho máximo do cache (padrão: 64)
+    PDI_CACHE_MAX_AGE_DAYS     idade máxima de uma entrada sem uso (padrão: 90)
+
+Uso:
+    from pdi_cache import cache_key, load_cached, store_cached
+
+    python scripts/pdi_cache.py --prune    # aplica os limites de tamanho/idade
+    python scripts/pdi_cache.py --clear    # remove todas as entradas
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from cache_eviction import prune_directory
+
+# Incrementar quando o formato das entradas mudar
+CACHE_FORMAT_VERSION = 1
+
+CACHE_ENABLED = os.environ.get('PDI_CACHE', '1') != '0'
+CACHE_DIR = Path(os.environ.get('PDI_CACHE_DIR', Path.home() / '.cache' / 'avd-uisa' / 'pdi'))
+MAX_CACHE_BYTES = int(float(os.environ.get('PDI_CACHE_MAX_MB', '64')) * 1024 * 1024)
+MAX_AGE_SECONDS = int(float(os.environ.get('PDI_CACHE_MAX_AGE_DAYS', '90')) * 86400)
+
+ENTRY_SUFFIX = '.json'
+
+
+def cache_key(content, parser_version):
+    """Chave da entrada: SHA-256 do conteúdo (bytes) + versão do extrator"""
+    digest = hashlib.sha256(content).hexdigest()
+    return f"{digest}-p{parser_version}-f{CACHE_FORMAT_VERSION}"
+
+
+def load_cached(key):
+    """Resultado guardado para `key`, ou None"""
+    entry = CACHE_DIR / f"{key}{ENTRY_SUFFIX}"
+    try:
+        with open(entry, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠ Entrada de cache inválida ({entry.name}), reprocessando o PDI: {e}", file=sys.stderr)
+        entry.unlink(missing_ok=True)
+        return None
+
+    # Atualiza o mtime: a remoção considera o último uso
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+    return data
+
+
+def store_cached(key, data, prune=True):
+    """
+    Grava a entrada de forma atômica. Com `prune`, aplica os limites do cache
+    em seguida (o modo em lote desliga e aplica uma vez ao final).
+    """
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = CACHE_DIR / f".{key}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, CACHE_DIR / f"{key}{ENTRY_SUFFIX}")
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        if prune:
+            prune_cache()
+    except OSError as e:
+        print(f"⚠ Não foi possível gravar o cache do PDI: {e}", file=sys.stderr)
+
+
+def prune_cache(max_bytes=MAX_CACHE_BYTES, max_age_seconds=MAX_AGE_SECONDS):
+    """
+    Remove entradas sem uso há mais de `max_age_seconds` e, se o cache ainda
+    passar de `max_bytes`, as menos recentemente usadas até caber no limite.
+
+    Temporários abandonados por gravações interrompidas também são removidos.
+
+    Retorna a quantidade de entradas removidas.
+    """
+    return prune_directory(CACHE_DIR, (ENTRY_SUFFIX,), max_bytes, max_age_seconds)
+
+
+def clear_cache():
+    """Remove todas as entradas do cache"""
+    return prune_cache(max_bytes=-1, max_age_seconds=-1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manutenção do cache de PDIs extraídos")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--prune', action='store_true', help="Aplica os limites de tamanho e idade")
+    group.add_argument('--clear', action='store_true', help="Remove todas as entradas")
+    args = parser.parse_args()
+
+    removed = clear_cache() if args.clear else prune_cache()
+    print(f"Entradas removidas de {CACHE_DIR}: {removed}")
+    sys.exit(0)
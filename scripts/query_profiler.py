@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Perfil de consultas dos scripts Python
+Sistema AVD UISA
+
+Com DB_PROFILE=1, as conexões de avd_db.get_connection passam a devolver
+cursores instrumentados: cada comando é registrado pelo texto normalizado
+(literais e parâmetros viram ?, listas IN (...) e VALUES (...), (...) são
+colapsadas), com quantidade de execuções, linhas e latência acumulada
+(execute + fetch). Ao final do processo é impressa a tabela dos comandos mais
+caros, junto com o tempo total do script e quanto dele foi gasto no banco.
+
+Comandos repetidos muitas vezes (N+1, como um SELECT ... WHERE chapa = ?
+executado uma vez por funcionário) aparecem no topo da tabela com ⚠.
+
+Variáveis de ambiente:
+    DB_PROFILE=1           ativa o perfil
+    DB_PROFILE_TOP         quantidade de comandos na tabela (padrão: 20)
+    DB_PROFILE_JSON        grava o perfil completo neste arquivo JSON
+
+Uso:
+    DB_PROFILE=1 python scripts/setup-leaders-and-cycle.py
+    DB_PROFILE=1 DB_PROFILE_JSON=/tmp/perfil.json python import-hierarchy.py planilha.xlsx
+"""
+
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+PROFILE_ENABLED = os.environ.get('DB_PROFILE', '0') not in ('', '0')
+PROFILE_TOP = int(os.environ.get('DB_PROFILE_TOP', '20'))
+PROFILE_JSON = os.environ.get('DB_PROFILE_JSON') or None
+
+# Comandos executados ao menos este número de vezes são marcados como suspeitos de N+1
+N_PLUS_ONE_CALLS = 100
+
+# Largura da coluna de comando na tabela
+STATEMENT_WIDTH = 90
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w$.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s|\?')
+_ROW = r'\((?:[^()]|\([^()]*\))*\)'
+_VALUE_LISTS = re.compile(rf'\bVALUES\s*({_ROW})(?:\s*,\s*{_ROW})+', re.IGNORECASE)
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_statement(statement):
+    """Texto do comando sem literais, parâmetros e repetições, em uma linha"""
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode('utf-8', errors='replace')
+    text = _STRING_LITERAL.sub('?', statement)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _WHITESPACE.sub(' ', text).strip()
+    text = _IN_LIST.sub('IN (?+)', text)
+    return _VALUE_LISTS.sub(r'VALUES \1, ...', text)
+
+
+class QueryProfiler:
+    """Estatísticas acumuladas por comando normalizado"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement, seconds, rows=0, calls=1):
+        with self._lock:
+            entry = self.stats.get(statement)
+            if entry is None:
+                entry = self.stats[statement] = {'calls': 0, 'rows': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+            entry['calls'] += calls
+            entry['rows'] += max(rows, 0)
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+    def summary(self):
+        """Perfil completo, comandos ordenados por tempo acumulado"""
+        wall_seconds = time.perf_counter() - self.started
+        with self._lock:
+            items = sorted(self.stats.items(), key=lambda item: -item[1]['seconds'])
+
+        statements = [
+            {
+                'statement': statement,
+                'calls': entry['calls'],
+                'rows': entry['rows'],
+                'total_ms': round(entry['seconds'] * 1000, 3),
+                'avg_ms': round(entry['seconds'] * 1000 / entry['calls'], 3),
+                'max_ms': round(entry['max_seconds'] * 1000, 3),
+            }
+            for statement, entry in items
+        ]
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'script': sys.argv[0] if sys.argv else None,
+            'wall_seconds': round(wall_seconds, 3),
+            'db_seconds': round(sum(entry['seconds'] for _, entry in items), 3),
+            'calls': sum(entry['calls'] for _, entry in items),
+            'statements': statements,
+        }
+
+    def print_report(self, summary, top=PROFILE_TOP, file=None):
+        """Tabela dos `top` comandos mais caros"""
+        file = file or sys.stderr
+        wall = summary['wall_seconds']
+        db = summary['db_seconds']
+        share = db / wall * 100 if wall else 0
+
+        print("\n" + "=" * 60, file=file)
+        print("PERFIL DE CONSULTAS (DB_PROFILE)", file=file)
+        print("=" * 60, file=file)
+        print(f"Tempo total: {wall:.2f}s | no banco: {db:.2f}s ({share:.0f}%) | fora do banco: {wall - db:.2f}s",
+              file=file)
+        print(f"Comandos executados: {summary['calls']} ({len(summary['statements'])} distintos)\n", file=file)
+
+        print(f"   {'execuções':>9} {'linhas':>9} {'total ms':>10} {'média ms':>9}  comando", file=file)
+        for item in summary['statements'][:top]:
+            flag = '⚠' if item['calls'] >= N_PLUS_ONE_CALLS else ' '
+            statement = item['statement']
+            if len(statement) > STATEMENT_WIDTH:
+                statement = statement[:STATEMENT_WIDTH - 3] + '...'
+            print(f" {flag} {item['calls']:>9} {item['rows']:>9} {item['total_ms']:>10.1f} "
+                  f"{item['avg_ms']:>9.2f}  {statement}", file=file)
+
+        if any(item['calls'] >= N_PLUS_ONE_CALLS for item in summary['statements'][:top]):
+            print(f"\n⚠ Executado {N_PLUS_ONE_CALLS}+ vezes: possível N+1 (agrupe em lote ou em uma consulta)",
+                  file=file)
+
+    def report(self):
+        """Imprime a tabela e grava o JSON (DB_PROFILE_JSON), se configurado"""
+        if not self.stats:
+            return
+        summary = self.summary()
+        self.print_report(summary)
+        if PROFILE_JSON:
+            with open(PROFILE_JSON, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            print(f"Perfil gravado em {PROFILE_JSON}", file=sys.stderr)
+
+
+class ProfiledCursor:
+    """Cursor que registra cada comando no profiler; o restante é delegado ao cursor original"""
+
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._statement = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._statement = normalize_statement(operation)
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            # Linhas de SELECT são contadas no fetch
+            rowcount = self._cursor.rowcount if not self._cursor.with_rows else 0
+            self._profiler.record(self._statement, time.perf_counter() - started, rowcount)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._statement = normalize_statement(operation)
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._profiler.record(self._statement, time.perf_counter() - started, self._cursor.rowcount)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        if self._statement is not None:
+            if method == 'fetchone':
+                rows = 1 if result is not None else 0
+            else:
+                rows = len(result)
+            # Tempo de leitura somado ao comando, sem contar nova execução
+            self._profiler.record(self._statement, time.perf_counter() - started, rows, calls=0)
+        return result
+
+    def fetchone(self):
+        return self._fetch('fetchone')
+
+    def fetchmany(self, size=None):
+        return self._fetch('fetchmany', *(() if size is None else (size,)))
+
+    def fetchall(self):
+        return self._fetch('fetchall')
+
+
+class ProfiledConnection:
+    """Conexão cujos cursores são instrumentados; o restante é delegado à conexão original"""
+
+    def __init__(self, connection, profiler):
+        self._connection = connection
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._connection.close()
+
+    def cursor(self, *args, **kwargs):
+        return ProfiledCursor(self._connection.cursor(*args, **kwargs), self._profiler)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return self._connection.commit()
+        finally:
+            self._profiler.record('COMMIT', time.perf_counter() - started)
+
+    def rollback(self):
+        started = time.perf_counter()
+        try:
+            return self._connection.rollback()
+        finally:
+            self._profiler.record('ROLLBACK', time.perf_counter() - started)
+
+
+_profiler = None
+
+
+def get_profiler():
+    """Profiler do processo, criado (e com o relatório agendado para o fim) na primeira chamada"""
+    global _profiler
+    if _profiler is None:
+        _profiler = QueryProfiler()
+        atexit.register(_profiler.report)
+    return _profiler
+
+
+def instrument(connection):
+    """Envolve a conexão quando DB_PROFILE está ativo"""
+    if not PROFILE_ENABLED:
+        return connection
+    return ProfiledConnection(connection, get_profiler())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Classificação de cargos/funções em níveis hierárquicos e papéis
+Sistema AVD UISA
+
+Tabela única de palavras-chave usada por todos os importadores. O texto é
+normalizado sem acentos e em minúsculas ("Líder", "LIDER" e "lider" são
+equivalentes) e a tabela é compilada uma única vez em uma expressão regular
+que detecta todas as palavras-chave de cada linha em uma só passada sobre a
+Series do pandas; os níveis e papéis são derivados das colunas de presença.
+
+Uso:
+    from role_classifier import classify_functions
+
+    classes = classify_functions(df['funcao'])
+    df['hierarchyLevel'] = classes['hierarchy_level']
+"""
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Palavras-chave reconhecidas (sem acento, minúsculas)
+KEYWORDS = (
+    'presidente', 'diretor', 'gerente', 'coordenador', 'supervisor',
+    'lider', 'encarregado', 'senior', 'pleno', 'junior',
+)
+
+# employees.hierarchyLevel: primeira regra que casar, na ordem
+HIERARCHY_LEVEL_RULES = (
+    ('diretoria', ('presidente', 'diretor')),
+    ('gerencia', ('gerente',)),
+    ('coordenacao', ('coordenador',)),
+    ('supervisao', ('supervisor', 'lider')),
+)
+DEFAULT_HIERARCHY_LEVEL = 'operacional'
+
+# positions.level
+POSITION_LEVEL_RULES = (
+    ('diretor', ('presidente', 'diretor')),
+    ('gerente', ('gerente',)),
+    ('coordenador', ('coordenador',)),
+    ('especialista', ('supervisor', 'lider')),
+    ('senior', ('senior',)),
+    ('pleno', ('pleno',)),
+    ('junior', ('junior',)),
+)
+
+# Cargos/funções considerados de liderança
+LEADER_KEYWORDS = ('lider', 'coordenador', 'supervisor', 'gerente', 'diretor', 'encarregado')
+
+# users.role a partir do employees.hierarchyLevel
+USER_ROLE_BY_LEVEL = {
+    'diretoria': 'admin',
+    'gerencia': 'gestor',
+    'coordenacao': 'gestor',
+    'supervisao': 'gestor',
+}
+DEFAULT_USER_ROLE = 'colaborador'
+
+_COMBINING_MARKS = re.compile(r'[\u0300-\u036f]')
+
+
+def compile_keyword_pattern(keywords):
+    """
+    Compila uma regex com um grupo nomeado por palavra-chave. Cada grupo fica
+    em um lookahead opcional ancorado no início, então um único match informa
+    a presença de todas as palavras-chave da linha, independente da ordem.
+    """
+    lookaheads = ''.join(
+        f"(?:(?=.*?(?P<{keyword}>{re.escape(keyword)})))?" for keyword in keywords
+    )
+    return re.compile(f"^{lookaheads}", re.DOTALL)
+
+
+KEYWORD_PATTERN = compile_keyword_pattern(KEYWORDS)
+
+
+def fold_text(value):
+    """Texto sem acentos, minúsculo e sem espaços nas pontas (None para vazios)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    text = unicodedata.normalize('NFKD', str(value))
+    return _COMBINING_MARKS.sub('', text).strip().lower()
+
+
+def fold_series(series):
+    """Versão vetorizada de fold_text"""
+    return (
+        series.astype('string')
+        .str.normalize('NFKD')
+        .str.replace(_COMBINING_MARKS, '', regex=True)
+        .str.strip()
+        .str.lower()
+    )
+
+
+def keyword_flags(series, pattern=KEYWORD_PATTERN):
+    """DataFrame booleano (uma coluna por palavra-chave) com a presença de cada uma"""
+    series = pd.Series(series)
+    return fold_series(series).str.extract(pattern).notna()
+
+
+def select_by_rules(flags, rules, default=None):
+    """
+    Aplica regras (rótulo, palavras-chave) em ordem de prioridade sobre as
+    colunas de keyword_flags; linhas sem nenhuma regra recebem `default`.
+    """
+    conditions = [flags[list(keywords)].any(axis=1).to_numpy() for _, keywords in rules]
+    labels = [label for label, _ in rules]
+    selected = np.select(conditions, labels, default=None).astype(object)
+    if default is not None:
+        selected[pd.isna(selected)] = default
+    return pd.Series(selected, index=flags.index, dtype=object)
+
+
+def user_role_for_level(levels):
+    """users.role para um hierarchyLevel (valor único ou Series)"""
+    if isinstance(levels, pd.Series):
+        return levels.map(USER_ROLE_BY_LEVEL).fillna(DEFAULT_USER_ROLE).astype(object)
+    return USER_ROLE_BY_LEVEL.get(levels, DEFAULT_USER_ROLE)
+
+
+def classify_functions(*series):
+    """
+    Classifica cargos/funções em uma passada.
+
+    Recebe uma ou mais Series alinhadas (ex.: FUNÇÃO e CARGO); uma palavra-chave
+    em qualquer uma delas conta para a linha. Retorna um DataFrame com as colunas
+    hierarchy_level, position_level, is_leader e user_role.
+    """
+    flags = keyword_flags(series[0])
+    for other in series[1:]:
+        flags = flags | keyword_flags(other).reindex(flags.index, fill_value=False)
+
+    hierarchy_level = select_by_rules(flags, HIERARCHY_LEVEL_RULES, DEFAULT_HIERARCHY_LEVEL)
+    return pd.DataFrame({
+        'hierarchy_level': hierarchy_level,
+        'position_level': select_by_rules(flags, POSITION_LEVEL_RULES),
+        'is_leader': flags[list(LEADER_KEYWORDS)].any(axis=1),
+        'user_role': user_role_for_level(hierarchy_level),
+    }, index=flags.index)
+
+
+def title_matcher(titles):
+    """
+    Conjunto normalizado de títulos exatos (ex.: cargos de liderança), para
+    comparação sem diferenciar acentos e maiúsculas.
+    """
+    return frozenset(fold_text(title) for title in titles)
+
+
+def title_in(values, titles):
+    """
+    Verifica se o título (valor único ou Series) está em `titles`, ignorando
+    acentos, maiúsculas e espaços nas pontas. `titles` pode vir de title_matcher.
+    """
+    folded_titles = titles if isinstance(titles, frozenset) else title_matcher(titles)
+    if isinstance(values, pd.Series):
+        return fold_series(values).isin(folded_titles).fillna(False).astype(bool)
+    return fold_text(values) in folded_titles
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Geração de usernames em lote
+Sistema AVD UISA
+
+Username = primeiro nome + "." + primeiro sobrenome, sem acentos, minúsculo e
+só com [a-z0-9.]. Colisões, dentro do lote ou com usuários já cadastrados, são
+resolvidas com um sufixo numérico (joao.silva, joao.silva2, joao.silva3...),
+atribuído na ordem de entrada: o mesmo lote gera sempre os mesmos usernames.
+
+Os usernames existentes seguem a convenção do sistema (parte local do email
+em users.email).
+
+Uso:
+    from usernames import generate_usernames
+
+    df['username'] = generate_usernames(df['NOME'], df['CHAPA'], taken=existentes)
+"""
+
+import pandas as pd
+
+from role_classifier import fold_series, fold_text
+
+_FIRST_TWO_NAMES = r'^(?P<first>\S+)(?:\s+(?P<second>\S+))?'
+_INVALID_CHARS = r'[^0-9a-z.]'
+
+
+def fallback_username(chapa):
+    """Username de quem não tem nome utilizável"""
+    return f"user_{chapa}"
+
+
+def base_usernames(names, chapas):
+    """Usernames sem resolução de colisões para Series alinhadas de nomes e chapas"""
+    names = pd.Series(names)
+    chapas = pd.Series(chapas, index=names.index)
+
+    parts = fold_series(names).str.extract(_FIRST_TWO_NAMES)
+    base = parts['first'].str.cat(parts['second'], sep='.', na_rep=None)
+    base = base.fillna(parts['first']).str.replace(_INVALID_CHARS, '', regex=True)
+
+    fallback = 'user_' + chapas.astype(str)
+    return base.where(base.notna() & (base != ''), fallback).astype(object)
+
+
+def base_username(name, chapa):
+    """Versão para um único funcionário de base_usernames"""
+    return base_usernames(pd.Series([name], dtype=object), pd.Series([chapa], dtype=object)).iat[0]
+
+
+class UsernameAllocator:
+    """
+    Reserva usernames únicos. `taken` são os usernames já em uso; cada base
+    guarda o próximo sufixo a tentar, então resolver N colisões de uma mesma
+    base custa O(N) e não O(N²).
+    """
+
+    def __init__(self, taken=()):
+        self.taken = {fold_text(username) for username in taken if username}
+        self._next_suffix = {}
+
+    def allocate(self, base):
+        """Reserva e retorna `base`, ou `base` + o menor sufixo livre"""
+        if base not in self.taken:
+            self.taken.add(base)
+            return base
+
+        suffix = self._next_suffix.get(base, 2)
+        while f"{base}{suffix}" in self.taken:
+            suffix += 1
+        username = f"{base}{suffix}"
+        self.taken.add(username)
+        self._next_suffix[base] = suffix + 1
+        return username
+
+    def allocate_many(self, bases):
+        """Reserva uma sequência de bases, na ordem"""
+        return [self.allocate(base) for base in bases]
+
+
+def generate_usernames(names, chapas, taken=(), allocator=None):
+    """
+    Usernames únicos para Series alinhadas de nomes e chapas, considerando
+    `taken` (ou o estado de `allocator`, para lotes sucessivos).
+    """
+    bases = base_usernames(names, chapas)
+    allocator = allocator or UsernameAllocator(taken)
+    return pd.Series(allocator.allocate_many(bases), index=bases.index, dtype=object)
+
+
+def load_existing_usernames(connection):
+    """Usernames já em uso: parte local dos emails cadastrados em users"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT email FROM users WHERE email IS NOT NULL AND email <> ''")
+        return {fold_text(email.split('@', 1)[0]) for (email,) in cursor.fetchall()}
+    finally:
+        cursor.close()